@@ -1,75 +1,464 @@
 """
 Audio processing module
-Handles microphone input and pitch detection using autocorrelation
+Handles microphone input and pitch detection
 """
 
+import threading
+import time
 import numpy as np
 import pyaudio
-from config import NUM_SAMPLES, SAMPLING_RATE, MIC_DEVICE_INDEX
+from config import (
+    NUM_SAMPLES, SAMPLING_RATE, MIC_DEVICE_INDEX,
+    PITCH_MIN_CONFIDENCE, CAPTURE_MODE, HOP_SIZE, AUDIO_TARGET_LATENCY,
+    DSP_IN_PLACE, DSP_DTYPE,
+    TARGETED_DETECTION, ADAPTIVE_WINDOW, ANALYSIS_WINDOWS, WINDOW_PERIODS,
+    NOISE_GATE
+)
+from pitch import create_detector, Decimator, GoertzelDetector, NoiseGate
+from metrics import METRICS
+
+
+# Longest analysis window and the ring buffer size that holds two of them
+MAX_WINDOW = max(ANALYSIS_WINDOWS) if ADAPTIVE_WINDOW else NUM_SAMPLES
+RING_CAPACITY = 2 * MAX_WINDOW
+
+
+class RingBuffer:
+    """
+    Preallocated sample ring buffer written from the stream callback
+    
+    The callback thread writes and the detection thread reads the newest
+    window; both run in the process that owns the stream, and the lock
+    keeps a read from seeing a half-written block.
+    """
+    
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = capacity
+        self.written = 0              # Total samples written since creation
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._lock = threading.Lock()
+    
+    def write(self, samples):
+        """Append samples, overwriting the oldest ones"""
+        total = len(samples)
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        
+        with self._lock:
+            written = self.written
+            start = (written + total - n) % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            self.written = written + total
+    
+    def read_latest(self, out):
+        """
+        Copy the newest len(out) samples into out
+        
+        Returns:
+            Value of the write counter at the end of the copied window
+        """
+        n = len(out)
+        with self._lock:
+            end = self.written
+            start = (end - n) % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self._data[start:start + first]
+            out[first:] = self._data[:n - first]
+        return end
 
 
 class AudioProcessor:
-    """Manages audio input and pitch detection"""
+    """
+    Manages audio input and pitch detection
+    
+    Stream health is counted rather than hidden:
+        overruns           - input overflows reported by PortAudio
+        short_reads        - blocking reads that returned without a full
+                             window (timed out, or an overflow left less
+                             than a window buffered)
+        samples_lost       - captured samples never analyzed (overflowed,
+                             drained as stale backlog or skipped between
+                             overlapped windows)
+        detection_failures - analyzed frames without a usable pitch
+        frames_gated       - frames skipped by the noise gate (silence or
+                             a pluck transient)
+    """
     
-    def __init__(self):
+    def __init__(self, capture_mode=CAPTURE_MODE):
+        """
+        Args:
+            capture_mode: "blocking" or "callback" (see CAPTURE_MODE)
+        """
         # Initialize PyAudio
         self.pa = pyaudio.PyAudio()
         
-        # Open audio input stream
+        # Stream health counters (see class docstring); set before the
+        # stream opens because the callback updates them
+        self.overruns = 0
+        self.short_reads = 0
+        self.samples_lost = 0
+        self.detection_failures = 0
+        self.frames_analyzed = 0
+        self.frames_gated = 0
+        
+        # time.monotonic() when the newest sample of the last analyzed
+        # window was captured (readings are timestamped with it)
+        self.captured_at = 0.0
+        self._written_at = 0.0
+        self._max_backlog = int(AUDIO_TARGET_LATENCY * SAMPLING_RATE)
+        if METRICS.enabled:
+            METRICS.add_counters("tuner_audio", self.counters)
+        
+        # Callback capture keeps the newest samples in a ring buffer
+        if capture_mode == "callback":
+            self.ring = RingBuffer(RING_CAPACITY)
+            self._frame = np.empty(MAX_WINDOW, dtype=np.int16)
+            self._analyzed_at = 0
+            self._last_freq = 0
+            self._hop_ready = threading.Event()
+            stream_options = dict(
+                frames_per_buffer=HOP_SIZE,
+                stream_callback=self._on_audio
+            )
+        else:
+            self.ring = None
+            stream_options = dict(frames_per_buffer=NUM_SAMPLES)
+        
+        # Open audio input stream. It is opened once and left stopped
+        # until the first detection, so resuming capture after suspend()
+        # only restarts it (no device open or buffer setup)
         self.stream = self.pa.open(
             format=pyaudio.paInt16,
             channels=1,
             rate=SAMPLING_RATE,
             input=True,
-            frames_per_buffer=NUM_SAMPLES,
-            input_device_index=MIC_DEVICE_INDEX
+            input_device_index=MIC_DEVICE_INDEX,
+            start=False,
+            **stream_options
         )
+        self.suspended = True
+        
+        # Analysis pipeline: the decimation factor and window length pick a
+        # cached (decimator, detector, targeted filter bank) set
+        self.window = NUM_SAMPLES
+        self.hop = HOP_SIZE
+        self._factor = 1
+        self._pipelines = {}
+        self._search_range = None
+        self._target_freq = None
+        self.last_confidence = 0.0
+        
+        # Precompute buffers for every window size up front
+        if ADAPTIVE_WINDOW:
+            for window in ANALYSIS_WINDOWS:
+                self._pipeline(1, window)
+        self._activate()
+        self._scale = self.detector.dtype.type(1 / 32768.0)
+        
+        # Silence and pick transients are skipped before any DSP runs
+        self.gate = NoiseGate(num_samples=MAX_WINDOW) if NOISE_GATE else None
+    
+    def counters(self):
+        """Current stream health counters as a dict"""
+        return {
+            "overruns": self.overruns,
+            "short_reads": self.short_reads,
+            "samples_lost": self.samples_lost,
+            "detection_failures": self.detection_failures,
+            "frames_analyzed": self.frames_analyzed,
+            "frames_gated": self.frames_gated,
+        }
+    
+    def suspend(self):
+        """
+        Stop capturing while no one is tuning
+        
+        The stream stays open, and detectors and buffers stay allocated,
+        so resume() is quick. Must be called from the thread that runs
+        detection.
+        """
+        if not self.suspended:
+            self.stream.stop_stream()
+            self.suspended = True
+    
+    def resume(self):
+        """Restart capture; audio from before the pause is never analyzed"""
+        if not self.suspended:
+            return
+        if self.ring is not None:
+            # Analyze once a full window of new audio has arrived
+            self._analyzed_at = self.ring.written + self.window - self.hop
+            self._last_freq = 0
+        if self.gate is not None:
+            self.gate.reset()
+        self.stream.start_stream()
+        self.suspended = False
+    
+    def _pipeline(self, factor, window):
+        """Get (or build) the detectors for a decimation factor and window"""
+        key = (factor, window)
+        if key not in self._pipelines:
+            if factor == 1:
+                decimator, rate, num_samples = None, SAMPLING_RATE, window
+            else:
+                decimator = Decimator(factor, DSP_DTYPE)
+                rate = SAMPLING_RATE / factor
+                num_samples = decimator.output_length(window)
+            
+            # Pitch detector selected in config, plus the targeted filter
+            # bank for a known note (manual string mode)
+            detector = create_detector(rate=rate, num_samples=num_samples)
+            targeted = GoertzelDetector(rate, num_samples) if TARGETED_DETECTION else None
+            self._pipelines[key] = (decimator, detector, targeted)
+        return self._pipelines[key]
+    
+    def _activate(self):
+        """Switch to the pipeline for the current factor and window"""
+        self.decimator, self.detector, self.targeted = self._pipeline(self._factor, self.window)
+        
+        # Carry the search band and target over to the new detectors
+        if self._search_range is None:
+            self.detector.clear_search_range()
+        else:
+            self.detector.set_search_range(*self._search_range)
+        if self.targeted is not None:
+            self.targeted.set_target(self._target_freq)
+    
+    def set_search_range(self, min_freq, max_freq):
+        """Restrict the pitch search to a frequency band"""
+        self._search_range = (min_freq, max_freq)
+        self.detector.set_search_range(min_freq, max_freq)
+    
+    def clear_search_range(self):
+        """Search every lag of the frame again"""
+        self._search_range = None
+        self.detector.clear_search_range()
+    
+    def set_target_frequency(self, freq):
+        """
+        Measure around a known target note instead of searching blindly
+        (only when TARGETED_DETECTION is enabled)
+        
+        Args:
+            freq: Target frequency in Hz, or None to search again
+        """
+        self._target_freq = freq
+        if self.targeted is not None:
+            self.targeted.set_target(freq)
     
-    def detect_pitch(self):
+    def set_decimation(self, max_freq):
+        """
+        Decimate ahead of the detector according to the highest frequency
+        that must be detected (the top string of the current tuning)
+        
+        Args:
+            max_freq: Highest frequency of interest in Hz, or None to
+                analyze at the full sampling rate
+        """
+        factor = 1 if max_freq is None else Decimator.factor_for(max_freq)
+        if factor != self._factor:
+            self._factor = factor
+            self._activate()
+    
+    def set_window(self, min_freq):
+        """
+        Size the analysis window for the lowest frequency to be detected
+        
+        Picks the shortest of ANALYSIS_WINDOWS holding WINDOW_PERIODS
+        periods of min_freq, and scales the hop to keep the configured
+        overlap. Low strings get long windows, high strings lock faster.
+        
+        Args:
+            min_freq: Lowest frequency of interest in Hz, or None for
+                the default NUM_SAMPLES window
+        """
+        if min_freq is None:
+            window = NUM_SAMPLES
+        else:
+            needed = WINDOW_PERIODS * SAMPLING_RATE / min_freq
+            window = next((w for w in sorted(ANALYSIS_WINDOWS) if w >= needed), MAX_WINDOW)
+        
+        if window != self.window:
+            self.window = window
+            self.hop = max(1, window * HOP_SIZE // NUM_SAMPLES)
+            self._activate()
+    
+    def detect_pitch(self, block=False):
         """
         Detect the fundamental frequency from microphone input
+        
+        Args:
+            block: Wait for fresh audio instead of returning early
+        
         Returns: frequency in Hz, or 0 if detection fails
         """
-        if self.stream.get_read_available() < NUM_SAMPLES:
+        if self.suspended:
+            self.resume()
+        
+        if self.ring is not None:
+            return self._detect_overlapped(block)
+        
+        window = self.window
+        available = self.stream.get_read_available()
+        if not block and available < window:
             return 0
         
+        start = METRICS.start()
+        
+        # Drop backlog left by a slow loop pass so the freshest audio is
+        # analyzed (at most AUDIO_TARGET_LATENCY behind the input)
+        backlog = available - window
+        if backlog > self._max_backlog:
+            self._drain(backlog)
+        
         # Read raw data from microphone
-        data = self.stream.read(NUM_SAMPLES, exception_on_overflow=False)
-        audio = np.frombuffer(data, dtype=np.int16) / 32768.0
+        data = self._read(window)
+        if data is None:
+            self.short_reads += 1
+            return 0
+        self.captured_at = time.monotonic()
+        METRICS.stop("audio_read", start)
         
-        # Detect pitch using autocorrelation
-        return self._autocorrelation(audio, SAMPLING_RATE)
+        return self._analyze(np.frombuffer(data, dtype=np.int16), window)
     
-    def _autocorrelation(self, signal, rate):
+    def _read(self, frames):
         """
-        Estimate fundamental frequency using autocorrelation method
+        Blocking read that counts input overflows
         
-        Args:
-            signal: Audio signal array
-            rate: Sampling rate in Hz
+        PyAudio discards the block a read reports an overflow on. Rather
+        than block for a whole new window, the frames already buffered
+        are analyzed (an overflow means the input buffer filled up, so
+        normally a full window is waiting).
         
         Returns:
-            Detected frequency in Hz
+            The samples as bytes, or None if less than a window is buffered
+        """
+        try:
+            return self.stream.read(frames, exception_on_overflow=True)
+        except OSError as error:
+            if error.errno != pyaudio.paInputOverflowed:
+                raise
+            self.overruns += 1
+            self.samples_lost += frames
+            if self.stream.get_read_available() < frames:
+                return None
+            return self.stream.read(frames, exception_on_overflow=False)
+    
+    def _drain(self, frames):
         """
-        # Remove DC offset
-        signal = signal - np.mean(signal)
+        Discard stale backlog
         
-        # Compute autocorrelation
-        corr = np.correlate(signal, signal, mode='full')[len(signal) - 1:]
+        An overflow here is counted but not re-read: the samples were
+        going to be dropped anyway, and reading fresh ones would add the
+        latency the drain is meant to remove.
+        """
+        try:
+            self.stream.read(frames, exception_on_overflow=True)
+        except OSError as error:
+            if error.errno != pyaudio.paInputOverflowed:
+                raise
+            self.overruns += 1
+        self.samples_lost += frames
+    
+    def _detect_overlapped(self, block):
+        """
+        Analyze the newest analysis window once per hop
         
-        # Find the first peak
-        d = np.diff(corr)
-        if len(d) == 0:
-            return 0
+        Until a full hop has arrived since the last analysis the window
+        is essentially unchanged, so the previous reading is returned.
+        """
+        start = METRICS.start()
+        if block and not self._wait_for_hop():
+            self.short_reads += 1
+        
+        written = self.ring.written
+        if written < self.window or written - self._analyzed_at < self.hop:
+            return self._last_freq
+        
+        frame = self._frame[:self.window]
+        previous = self._analyzed_at
+        self._analyzed_at = self.ring.read_latest(frame)
+        self.captured_at = self._written_at
+        if previous:
+            # Samples that fell between this window and the last one
+            self.samples_lost += max(0, self._analyzed_at - previous - self.window)
+        METRICS.stop("audio_read", start)
+        advance = self._analyzed_at - previous if previous else self.window
+        self._last_freq = self._analyze(frame, advance)
+        return self._last_freq
+    
+    def _wait_for_hop(self):
+        """
+        Wait until a full hop of new samples is in the ring buffer
         
-        start = np.where(d > 0)[0]
-        if len(start) == 0:
+        Returns:
+            False if the stream stalled for longer than two hops
+        """
+        timeout = 2 * max(self.hop, HOP_SIZE) / SAMPLING_RATE
+        while True:
+            self._hop_ready.clear()
+            written = self.ring.written
+            if written >= self.window and written - self._analyzed_at >= self.hop:
+                return True
+            if not self._hop_ready.wait(timeout):
+                return False
+    
+    def _analyze(self, samples, advance):
+        """
+        Run the configured detector on a frame of int16 samples
+        
+        Args:
+            samples: int16 analysis frame
+            advance: New samples since the previous frame (for the gate)
+        """
+        if self.gate is not None and not self.gate.update(samples, advance):
+            # Silence and a pluck transient both read as no pitch, so a
+            # new note never shows the previous note's frequency
+            self.frames_gated += 1
+            self.last_confidence = 0.0
             return 0
         
-        peak = np.argmax(corr[start[0]:]) + start[0]
+        if self.targeted is not None and self._target_freq is not None:
+            detector = self.targeted
+        else:
+            detector = self.detector
+        
+        start = METRICS.start()
+        if self.decimator is not None:
+            frame = samples * self._scale
+            frame -= frame.mean()
+            signal = detector.prepare(self.decimator.process(frame))
+        elif DSP_IN_PLACE:
+            # Convert and remove DC inside the detector's work buffer
+            signal = detector.prepare_pcm(samples)
+        else:
+            signal = detector.prepare(samples * self._scale)
+        start = METRICS.stop("conversion", start)
         
-        # Calculate frequency
-        return rate / peak if peak != 0 else 0
+        freq, self.last_confidence = detector.estimate(signal)
+        if freq and self.decimator is not None and detector is self.detector:
+            # The lag-based detectors only resolve the period to one
+            # decimated lag; refine it on the full-rate frame
+            freq = self.decimator.refine(frame, freq)
+        METRICS.stop("pitch_estimate", start)
+        METRICS.frame()
+        
+        self.frames_analyzed += 1
+        if not freq or self.last_confidence < PITCH_MIN_CONFIDENCE:
+            self.detection_failures += 1
+            freq = 0
+        return freq
+    
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PyAudio stream callback: append captured samples to the ring buffer"""
+        if status & pyaudio.paInputOverflow:
+            self.overruns += 1
+        self.ring.write(np.frombuffer(in_data, dtype=np.int16))
+        self._written_at = time.monotonic()
+        self._hop_ready.set()
+        return None, pyaudio.paContinue
     
     @staticmethod
     def freq_to_cents(detected_freq, target_freq):
@@ -35,9 +35,12 @@ def build_executable():
         "--add-data=config.py:.",       # Include all Python modules
         "--add-data=hardware.py:.",
         "--add-data=audio.py:.",
+        "--add-data=pitch.py:.",
         "--add-data=tuning.py:.",
+        "--add-data=worker.py:.",
         "--add-data=state.py:.",
         "--add-data=web_interface.py:.",
+        "--add-data=metrics.py:.",
         "main.py"                       # Main entry point
     ]
     
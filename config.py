@@ -11,6 +11,7 @@ BTN_LEFT = 4
 BTN_RIGHT = 17
 BTN_ENTER = 27
 BTN_BACK = 22
+BUTTON_DEBOUNCE_MS = 50   # Level must be stable this long to count
 
 # RGB LED pins
 LED_R = 5
@@ -21,6 +22,9 @@ LED_B = 13
 LCD_RS = 18
 LCD_E = 23
 LCD_DATA = [24, 25, 16, 20]
+LCD_COLS = 16
+LCD_ROWS = 2
+LCD_MAX_FPS = 20          # Cap on LCD refreshes per second
 
 # ============================================================
 # AUDIO CONFIGURATION
@@ -29,23 +33,141 @@ NUM_SAMPLES = 4096
 SAMPLING_RATE = 48000
 MIC_DEVICE_INDEX = 2
 
+# Audio capture mode:
+#   "blocking" - read whole NUM_SAMPLES blocks from the stream
+#   "callback" - stream callback fills a ring buffer and the newest
+#                NUM_SAMPLES window is analyzed every HOP_SIZE samples
+CAPTURE_MODE = "blocking"
+HOP_SIZE = 512                # ~10 ms at 48 kHz
+
+# Blocking mode: backlog queued beyond the analysis window and this many
+# seconds is drained before each read, so a slow loop pass (LCD write,
+# burst of web requests) never leaves the tuner analyzing old audio
+AUDIO_TARGET_LATENCY = 0.05
+
+# Where pitch detection runs:
+#   "inline" - called from the main UI loop
+#   "thread" - dedicated worker thread, the UI loop only reads the result
+#   "process" - capture and detection in a separate process; targets and
+#               results are exchanged through shared memory
+DSP_BACKEND = "inline"
+READING_MAX_AGE = 0.5         # Seconds before a reading counts as stale
+
+# Main loop pacing: the tuner screen polls every TUNER_LOOP_SLEEP seconds.
+# Menu screens pause the audio stream and sleep until a button press or
+# a state change (web), waking at least every MENU_IDLE_TIMEOUT seconds.
+TUNER_LOOP_SLEEP = 0.01
+MENU_IDLE_TIMEOUT = 1.0
+
+# Pitch detector:
+#   "autocorrelation" - first autocorrelation peak (original algorithm)
+#   "yin"             - YIN cumulative mean normalized difference
+#   "mpm"             - McLeod Pitch Method (normalized square difference)
+# YIN and MPM give stable readings from shorter windows, so NUM_SAMPLES
+# can be lowered to cut latency. YIN needs two periods of the lowest
+# string per frame; MPM reaches D1 even at NUM_SAMPLES = 2048.
+PITCH_DETECTOR = "autocorrelation"
+YIN_THRESHOLD = 0.15          # Dip threshold for YIN
+MPM_CUTOFF = 0.93             # Key-maximum cutoff for MPM
+PITCH_MIN_CONFIDENCE = 0.0    # Readings below this confidence are dropped
+
+# Floating point type of the DSP pipeline. "float32" halves the memory
+# traffic of every correlation and FFT (needs NumPy 2.0+ to stay float32
+# through the FFTs)
+DSP_DTYPE = "float64"
+
+# In manual string mode the target note is known: measure it with a
+# precomputed Goertzel filter bank around the target and its harmonics
+# instead of a blind pitch search
+TARGETED_DETECTION = False
+GOERTZEL_SPAN_CENTS = 100     # Bank covers target +/- this many cents
+GOERTZEL_STEP_CENTS = 10      # Bin spacing before peak refinement
+GOERTZEL_HARMONICS = 3        # Harmonics summed with the fundamental
+
+# Frequency-adaptive analysis window: each target gets the shortest of
+# ANALYSIS_WINDOWS holding WINDOW_PERIODS periods of its lowest note, and
+# a hop that keeps the NUM_SAMPLES / HOP_SIZE overlap. High strings lock
+# faster; D1/E1 on the 8-string tunings get 8192 samples.
+ADAPTIVE_WINDOW = False
+ANALYSIS_WINDOWS = (1024, 2048, 4096, 8192)
+WINDOW_PERIODS = 6
+
+# Noise gate and pluck-onset detector ahead of the pitch detector. Frames
+# quieter than NOISE_GATE_DB (RMS, dB below full scale) are not analyzed;
+# after the level jumps by ONSET_RISE_DB (a pluck) analysis waits
+# ONSET_HOLD seconds so only the sustained part of the note is measured.
+# The gate closes again NOISE_GATE_HYSTERESIS_DB below the open level.
+NOISE_GATE = False
+NOISE_GATE_DB = -50
+NOISE_GATE_HYSTERESIS_DB = 6
+ONSET_RISE_DB = 9
+ONSET_HOLD = 0.06
+NOISE_GATE_STRIDE = 4         # Level measured on every n-th sample
+
+# Convert, remove DC and search peaks in preallocated buffers instead of
+# allocating new arrays every frame (fully allocation-free with the
+# autocorrelation detector, the "fft" engine and NumPy 2.0+)
+DSP_IN_PLACE = False
+
+# Anti-aliased decimation ahead of the detector. The factor follows the
+# current tuning: the highest string keeps DECIMATION_HEADROOM harmonics
+# below the decimated Nyquist (48 kHz -> 8 kHz for E4). With ~6x fewer
+# samples per frame a longer NUM_SAMPLES (e.g. 8192) becomes affordable
+# for the D1/E1 strings. The period found at the decimated rate is
+# refined on the full-rate frame, so low strings keep full-rate accuracy.
+DECIMATION = False
+DECIMATION_HEADROOM = 12
+
+# Autocorrelation engine used by the autocorrelation detector:
+#   "direct" - np.correlate, O(N^2) per frame
+#   "fft"    - Wiener-Khinchin via zero-padded FFT, O(N log N) per frame
+AUTOCORRELATION_ENGINE = "direct"
+
+# Pitch search range:
+#   "full"   - scan every lag of the frame
+#   "tuning" - only lags between the lowest and highest string of the
+#              current tuning (narrowed to the selected string in manual mode)
+PITCH_SEARCH_MODE = "full"
+SEARCH_MARGIN_SEMITONES = 2   # Margin around the tuning band
+MANUAL_SEARCH_SEMITONES = 1   # Range around the selected string
+
 # ============================================================
 # TUNING THRESHOLDS (in cents)
 # ============================================================
 THRESHOLD_PERFECT = 15  # Green LED - in tune
 THRESHOLD_CLOSE = 30    # Yellow LED - close to tune
 
+# LED feedback:
+#   "discrete" - green / yellow / red by the thresholds above
+#   "pwm"      - software PWM fading from green through yellow to red in
+#                proportion to the offset (fully red at LED_FADE_CENTS)
+LED_MODE = "discrete"
+LED_PWM_FREQ = 200      # Hz
+LED_FADE_CENTS = 50
+
+# ============================================================
+# CHROMATIC MODE
+# ============================================================
+# Menu entry (offered for every instrument) that shows the nearest
+# equal-tempered note instead of matching the strings of a tuning
+CHROMATIC_TUNING = "Chromatic"
+CHROMATIC_A4 = 440.0          # Reference pitch in Hz
+CHROMATIC_MIN_FREQ = 30       # Note table covers the full guitar range
+CHROMATIC_MAX_FREQ = 1500
+
 # ============================================================
 # TUNINGS DATA
 # ============================================================
 TUNINGS_6_STRING = [
     "E Standard", "Drop D", "D Standard", "Drop C", 
-    "Drop C#", "Drop B", "Drop A", "Drop A#", "Drop G"
+    "Drop C#", "Drop B", "Drop A", "Drop A#", "Drop G",
+    CHROMATIC_TUNING
 ]
 
 TUNINGS_8_STRING = [
     "Standard F#", "Drop E", "Drop D", 
-    "E Standard", "F Standard", "Double Drop D"
+    "E Standard", "F Standard", "Double Drop D",
+    CHROMATIC_TUNING
 ]
 
 # Frequency map for specific notes in Hertz (Hz)
@@ -104,8 +226,35 @@ TUNING_FREQUENCIES = {
     },
 }
 
+# ============================================================
+# METRICS
+# ============================================================
+# Per-stage latency histograms served at /metrics (Prometheus text format).
+# Off by default: disabled probes skip the clock reads entirely.
+METRICS_ENABLED = False
+# Histogram bucket upper bounds in seconds (fixed memory per stage)
+METRICS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
 # ============================================================
 # WEB SERVER CONFIGURATION
 # ============================================================
 WEB_HOST = "0.0.0.0"
 WEB_PORT = 5000
+
+# Web server:
+#   "development" - Flask's built-in server, a new thread per connection
+#   "pooled"      - WSGI server with a fixed pool of WEB_WORKERS threads;
+#                   extra connections wait in the listen backlog, so a
+#                   room full of clients cannot starve the DSP loop
+# Measure with: python3 load_test.py --clients 30
+WEB_SERVER = "development"
+WEB_WORKERS = 8
+WEB_BACKLOG = 128         # Pending connections queued by the kernel
+WEB_CLIENT_TIMEOUT = 30   # Seconds before a stalled client is dropped
+EVENTS_MAX_SUBSCRIBERS = 4  # Pooled mode: /events streams each hold a worker
+
+# Live tuner push channel (/events, Server-Sent Events)
+EVENTS_BACKLOG = 64       # Deltas kept for subscribers that fall behind
+EVENTS_KEEPALIVE = 15     # Seconds between keep-alive comments
+STATIC_MAX_AGE = 31536000 # Cache lifetime of fingerprinted CSS/JS (1 year)
@@ -3,115 +3,559 @@ Hardware module for GPIO control
 Handles buttons, RGB LED, and LCD display
 """
 
-import RPi.GPIO as GPIO
+import queue
+import threading
 import time
-from RPLCD import CharLCD
 from config import (
     BTN_LEFT, BTN_RIGHT, BTN_ENTER, BTN_BACK,
     LED_R, LED_G, LED_B,
-    LCD_RS, LCD_E, LCD_DATA
+    LCD_RS, LCD_E, LCD_DATA, LCD_COLS, LCD_ROWS, LCD_MAX_FPS,
+    BUTTON_DEBOUNCE_MS, THRESHOLD_PERFECT, THRESHOLD_CLOSE,
+    LED_MODE, LED_PWM_FREQ, LED_FADE_CENTS
 )
 
+try:
+    import RPi.GPIO
+    from RPLCD import CharLCD
+except ImportError:
+    # Not on a Pi: HardwareController needs FakeGPIO / FakeLCD instead
+    RPi = CharLCD = None
+
+
+class LcdFramebuffer:
+    """
+    Shadow framebuffer for a character LCD
+    
+    Screens are drawn into `frame`; flush() compares it with what the LCD
+    already shows and sends only the runs of changed characters, at most
+    max_fps times per second. Every HD44780 transfer is slow in 4-bit
+    mode, and a full clear() costs milliseconds, so unchanged cells are
+    never resent and the display is never cleared.
+    """
+    
+    # Unchanged cells between two runs that are cheaper to resend than a
+    # cursor move (one command transfer)
+    MERGE_GAP = 1
+    
+    def __init__(self, lcd, cols=LCD_COLS, rows=LCD_ROWS, max_fps=LCD_MAX_FPS):
+        self.lcd = lcd
+        self.cols = cols
+        self.rows = rows
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.frame = [[" "] * cols for _ in range(rows)]
+        self.shown = [[" "] * cols for _ in range(rows)]
+        self._flushed_at = float("-inf")
+        lcd.clear()
+    
+    def write(self, text, row=0, col=0):
+        """Draw text into the frame (clipped to the row)"""
+        line = self.frame[row]
+        for i, char in enumerate(text[:max(0, self.cols - col)]):
+            line[col + i] = char
+    
+    def set_lines(self, *lines):
+        """Replace the whole frame; missing rows are blank"""
+        for row in range(self.rows):
+            text = lines[row] if row < len(lines) else ""
+            self.frame[row][:] = text[:self.cols].ljust(self.cols)
+    
+    @property
+    def dirty(self):
+        """True if the frame differs from what the LCD shows"""
+        return self.frame != self.shown
+    
+    def flush_delay(self):
+        """Seconds until held-back changes may be sent (None if none are pending)"""
+        if not self.dirty:
+            return None
+        return max(0.0, self.interval - (time.monotonic() - self._flushed_at))
+    
+    def flush(self, force=False):
+        """
+        Send changed character runs to the LCD
+        
+        Args:
+            force: Ignore the refresh rate cap
+        
+        Returns:
+            True if the LCD now matches the frame
+        """
+        if not self.dirty:
+            return True
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.interval:
+            return False
+        self._flushed_at = now
+        
+        for row in range(self.rows):
+            want, have = self.frame[row], self.shown[row]
+            for start, end in self._changed_runs(want, have):
+                self.lcd.cursor_pos = (row, start)
+                self.lcd.write_string("".join(want[start:end]))
+                have[start:end] = want[start:end]
+        return True
+    
+    def _changed_runs(self, want, have):
+        """Yield (start, end) column runs that differ, merging small gaps"""
+        start = end = None
+        for col in range(self.cols):
+            if want[col] == have[col]:
+                continue
+            if start is not None and col - end > self.MERGE_GAP:
+                yield start, end
+                start = None
+            if start is None:
+                start = col
+            end = col + 1
+        if start is not None:
+            yield start, end
+
+
+class LedDriver:
+    """
+    RGB LED that remembers its color
+    
+    set() only touches GPIO when the color actually changes. In "pwm" mode
+    each channel is a software PWM output (RPi.GPIO generates the waveform
+    on its own thread, off the main loop) and a color is a duty cycle per
+    channel; duty cycles are whole percent, so tiny changes are not resent.
+    """
+    
+    OFF = (0, 0, 0)
+    GREEN = (0, 1, 0)
+    YELLOW = (1, 1, 0)
+    RED = (1, 0, 0)
+    BLUE = (0, 0, 1)
+    
+    def __init__(self, gpio, pins=(LED_R, LED_G, LED_B), mode=LED_MODE, freq=LED_PWM_FREQ):
+        self.gpio = gpio
+        self.pins = list(pins)
+        self.color = None
+        gpio.setup(self.pins, gpio.OUT)
+        
+        if mode == "pwm":
+            self._pwm = [gpio.PWM(pin, freq) for pin in self.pins]
+            for channel in self._pwm:
+                channel.start(0)
+            self.color = (0, 0, 0)
+        else:
+            self._pwm = None
+    
+    @property
+    def pwm(self):
+        """True when colors are faded with software PWM"""
+        return self._pwm is not None
+    
+    def set(self, color):
+        """
+        Set the LED color
+        
+        Args:
+            color: (r, g, b) levels from 0 to 1 (rounded to on/off
+                without PWM)
+        
+        Returns:
+            True if GPIO was written
+        """
+        if self._pwm is None:
+            levels = tuple(1 if c >= 0.5 else 0 for c in color)
+        else:
+            levels = tuple(int(round(100 * c)) for c in color)
+        if levels == self.color:
+            return False
+        
+        if self._pwm is None:
+            self.gpio.output(self.pins, list(levels))
+        else:
+            for channel, duty, old in zip(self._pwm, levels, self.color):
+                if duty != old:
+                    channel.ChangeDutyCycle(duty)
+        self.color = levels
+        return True
+    
+    def set_cents(self, cents):
+        """Show a tuning offset (None turns the LED off)"""
+        if cents is None:
+            return self.set(self.OFF)
+        if self._pwm is not None:
+            return self.set(self.fade_color(cents))
+        
+        abs_cents = abs(cents)
+        if abs_cents <= THRESHOLD_PERFECT:
+            return self.set(self.GREEN)
+        if abs_cents <= THRESHOLD_CLOSE:
+            return self.set(self.YELLOW)
+        return self.set(self.RED)
+    
+    @staticmethod
+    def fade_color(cents):
+        """
+        Proportional color for a tuning offset
+        
+        Green inside THRESHOLD_PERFECT, then through yellow (halfway) to
+        red at LED_FADE_CENTS.
+        """
+        span = max(LED_FADE_CENTS - THRESHOLD_PERFECT, 1e-9)
+        t = min(max((abs(cents) - THRESHOLD_PERFECT) / span, 0.0), 1.0)
+        return (min(1.0, 2 * t), min(1.0, 2 * (1 - t)), 0.0)
+    
+    def stop(self):
+        """Turn the LED off and stop PWM output"""
+        self.set(self.OFF)
+        if self._pwm is not None:
+            for channel in self._pwm:
+                channel.stop()
+
 
 class HardwareController:
     """Manages all GPIO hardware interactions"""
     
-    def __init__(self):
+    def __init__(self, gpio=None, lcd=None):
+        """
+        Args:
+            gpio: GPIO module to drive (defaults to RPi.GPIO; pass a
+                FakeGPIO to run without a Pi)
+            lcd: Character LCD object (defaults to an RPLCD CharLCD)
+        """
+        if gpio is None:
+            if RPi is None:
+                raise ImportError("RPi.GPIO is not installed; pass gpio=FakeGPIO()")
+            gpio = RPi.GPIO
+        self.gpio = gpio
+        
         # Set pin numbering mode to BCM
-        GPIO.setmode(GPIO.BCM)
+        gpio.setmode(gpio.BCM)
         
-        # Initialize buttons
+        # Initialize buttons: edge callbacks (run on the GPIO library's
+        # thread) debounce in software and queue one event per press
         self.buttons = [BTN_LEFT, BTN_RIGHT, BTN_ENTER, BTN_BACK]
+        self._events = queue.SimpleQueue()
+        self._input_ready = threading.Event()
+        self._debounce = BUTTON_DEBOUNCE_MS / 1000.0
+        self._pressed = {pin: False for pin in self.buttons}
+        self._changed_at = {pin: 0.0 for pin in self.buttons}
+        self._resample = {pin: None for pin in self.buttons}
+        self._closed = False
+        self._button_lock = threading.Lock()
         for pin in self.buttons:
-            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+            gpio.add_event_detect(pin, gpio.BOTH, callback=self._on_button_edge)
         
         # Initialize RGB LED
-        GPIO.setup([LED_R, LED_G, LED_B], GPIO.OUT)
+        self.led = LedDriver(gpio)
         self.led_off()
         
         # Initialize LCD
-        self.lcd = CharLCD(
-            numbering_mode=GPIO.BCM, 
-            cols=16, 
-            rows=2,
-            pin_rs=LCD_RS, 
-            pin_rw=None, 
-            pin_e=LCD_E, 
-            pins_data=LCD_DATA
-        )
+        if lcd is None:
+            lcd = CharLCD(
+                numbering_mode=gpio.BCM, 
+                cols=16, 
+                rows=2,
+                pin_rs=LCD_RS, 
+                pin_rw=None, 
+                pin_e=LCD_E, 
+                pins_data=LCD_DATA
+            )
+        self.lcd = lcd
+        self.display = LcdFramebuffer(lcd)
     
     # ============================================================
     # LED CONTROL METHODS
     # ============================================================
     def led_off(self):
         """Turn off all LED colors"""
-        GPIO.output([LED_R, LED_G, LED_B], [0, 0, 0])
+        self.led.set(LedDriver.OFF)
     
     def led_green(self):
         """Set LED to green (in-tune signal)"""
-        GPIO.output([LED_R, LED_G, LED_B], [0, 1, 0])
+        self.led.set(LedDriver.GREEN)
     
     def led_yellow(self):
         """Set LED to yellow (slightly out of tune)"""
-        GPIO.output([LED_R, LED_G, LED_B], [1, 1, 0])
+        self.led.set(LedDriver.YELLOW)
     
     def led_red(self):
         """Set LED to red (significantly out of tune)"""
-        GPIO.output([LED_R, LED_G, LED_B], [1, 0, 0])
+        self.led.set(LedDriver.RED)
     
     def led_blue(self):
         """Set LED to blue (system/processing state)"""
-        GPIO.output([LED_R, LED_G, LED_B], [0, 0, 1])
+        self.led.set(LedDriver.BLUE)
+    
+    def led_cents(self, cents):
+        """Show a tuning offset in cents (None turns the LED off)"""
+        self.led.set_cents(cents)
     
     # ============================================================
     # BUTTON METHODS
     # ============================================================
     def is_button_pressed(self, button_pin):
         """Check if a button is currently pressed"""
-        return GPIO.input(button_pin) == 0
+        return self.gpio.input(button_pin) == 0
+    
+    def _on_button_edge(self, pin):
+        """
+        GPIO edge callback
+        
+        A level change is accepted at most once per BUTTON_DEBOUNCE_MS, so
+        contact bounce on press and release is ignored. Each accepted
+        press queues one event.
+        """
+        now = time.monotonic()
+        with self._button_lock:
+            if self._closed:
+                return
+            pressed = self.gpio.input(pin) == 0
+            if pressed == self._pressed[pin]:
+                return
+            wait = self._changed_at[pin] + self._debounce - now
+            if wait > 0:
+                # Re-sample once the bounce window is over, so a tap shorter
+                # than the window still ends in the right state (one pending
+                # re-sample per pin, however much the contact chatters)
+                if self._resample[pin] is None:
+                    timer = threading.Timer(wait, self._resample_button, args=(pin,))
+                    timer.daemon = True
+                    self._resample[pin] = timer
+                    timer.start()
+                return
+            self._pressed[pin] = pressed
+            self._changed_at[pin] = now
+        if pressed:
+            self._events.put(pin)
+            self._input_ready.set()
+    
+    def _resample_button(self, pin):
+        """Debounce timer: re-read a pin once its bounce window is over"""
+        with self._button_lock:
+            self._resample[pin] = None
+        self._on_button_edge(pin)
     
-    def wait_button_release(self, button_pin):
-        """Wait for a button to be released"""
-        while GPIO.input(button_pin) == 0:
-            time.sleep(0.01)
-        time.sleep(0.1)
+    def get_button_events(self):
+        """
+        Drain queued button presses without blocking
+        
+        Returns:
+            List of button pins in the order they were pressed
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+    
+    def wait_for_input(self, timeout):
+        """
+        Sleep until a button press, a wake() call or the timeout
+        
+        Pending LCD changes held back by the refresh rate cap shorten the
+        wait, so they are still sent on time.
+        
+        Returns:
+            True if woken by input rather than the timeout
+        """
+        delay = self.display.flush_delay()
+        if delay is not None:
+            timeout = min(timeout, delay)
+        if self._input_ready.wait(timeout):
+            self._input_ready.clear()
+            return True
+        return False
+    
+    def wake(self):
+        """Make a pending wait_for_input() return (thread-safe)"""
+        self._input_ready.set()
     
     # ============================================================
     # LCD DISPLAY METHODS
     # ============================================================
     def clear_display(self):
         """Clear the LCD display"""
-        self.lcd.clear()
+        self.display.set_lines()
+        self.display.flush()
     
     def write_text(self, text, row=0, col=0):
         """Write text to LCD at specified position"""
-        self.lcd.cursor_pos = (row, col)
-        self.lcd.write_string(text)
+        self.display.write(text, row, col)
+        self.display.flush()
+    
+    def refresh_display(self):
+        """Send changes held back by the refresh rate cap"""
+        self.display.flush()
     
     def show_guitar_select(self):
         """Render the instrument selection screen"""
-        self.lcd.clear()
-        self.lcd.write_string("Choose Guitar:")
+        self.display.set_lines("Choose Guitar:")
+        self.display.flush()
     
     def show_tuning_menu(self, instrument, tuning_name):
         """Render the tuning selection screen"""
-        self.lcd.clear()
-        self.lcd.write_string(f"Tuning ({instrument}-str):")
-        self.lcd.cursor_pos = (1, 0)
-        self.lcd.write_string(f"{tuning_name}".ljust(16))
+        self.display.set_lines(f"Tuning ({instrument}-str):", f"{tuning_name}")
+        self.display.flush()
     
     def show_tuner(self, note="---", cents="---", string_num=None, max_str=None):
         """Render the real-time tuning screen"""
-        self.lcd.clear()
         str_info = f"{note} ({string_num}/{max_str})" if note and string_num else "---"
-        self.lcd.write_string(f"Str:{str_info}")
-        self.lcd.cursor_pos = (1, 0)
-        self.lcd.write_string(f"Cents:{cents}" if cents else "---")
+        self.display.set_lines(f"Str:{str_info}", f"Cents:{cents}" if cents else "---")
+        self.display.flush()
+    
+    def show_chromatic(self, note_line, cents="---"):
+        """Render the chromatic tuner screen from a precomputed note line"""
+        self.display.set_lines(note_line, f"Cents:{cents}" if cents else "---")
+        self.display.flush()
     
     # ============================================================
     # CLEANUP
     # ============================================================
     def cleanup(self):
         """Clean up GPIO resources"""
-        self.led_off()
-        GPIO.cleanup()
+        with self._button_lock:
+            # Pending re-samples must not read pins after they are released
+            self._closed = True
+            for pin, timer in self._resample.items():
+                if timer is not None:
+                    timer.cancel()
+                    self._resample[pin] = None
+        self.led.stop()
+        for pin in self.buttons:
+            self.gpio.remove_event_detect(pin)
+        self.gpio.cleanup()
+
+
+# ============================================================
+# FAKE HARDWARE (for running and testing without a Pi)
+# ============================================================
+class FakeGPIO:
+    """
+    In-memory stand-in for the RPi.GPIO module
+    
+    Inputs idle high (pull-ups). press()/release() change an input level
+    and fire edge callbacks synchronously, like the GPIO event thread.
+    """
+    
+    BCM = "BCM"
+    IN, OUT = "IN", "OUT"
+    PUD_UP = "PUD_UP"
+    RISING, FALLING, BOTH = "RISING", "FALLING", "BOTH"
+    
+    def __init__(self):
+        self.levels = {}
+        self.outputs = {}
+        self.callbacks = {}
+        self.writes = 0
+        self.pwms = {}
+    
+    def setmode(self, mode):
+        self.mode = mode
+    
+    def setup(self, pins, direction, pull_up_down=None):
+        for pin in pins if isinstance(pins, (list, tuple)) else [pins]:
+            if direction == self.IN:
+                self.levels[pin] = 1
+            else:
+                self.outputs[pin] = 0
+    
+    def input(self, pin):
+        return self.levels[pin]
+    
+    def output(self, pins, values):
+        if not isinstance(pins, (list, tuple)):
+            pins, values = [pins], [values]
+        for pin, value in zip(pins, values):
+            self.outputs[pin] = value
+            self.writes += 1
+    
+    def PWM(self, pin, freq):
+        self.pwms[pin] = FakePWM(self, pin, freq)
+        return self.pwms[pin]
+    
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        self.callbacks[pin] = (edge, callback)
+    
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+    
+    def cleanup(self):
+        self.callbacks.clear()
+    
+    def set_input(self, pin, level):
+        """Drive an input pin and fire its edge callback"""
+        if self.levels[pin] == level:
+            return
+        self.levels[pin] = level
+        edge, callback = self.callbacks.get(pin, (None, None))
+        wanted = self.RISING if level else self.FALLING
+        if callback is not None and edge in (wanted, self.BOTH):
+            callback(pin)
+    
+    def press(self, pin):
+        """Pull a button input low"""
+        self.set_input(pin, 0)
+    
+    def release(self, pin):
+        """Let a button input return high"""
+        self.set_input(pin, 1)
+
+
+class FakePWM:
+    """Software PWM channel of FakeGPIO"""
+    
+    def __init__(self, gpio, pin, freq):
+        self.gpio = gpio
+        self.pin = pin
+        self.freq = freq
+        self.duty = None
+    
+    def start(self, duty):
+        self.ChangeDutyCycle(duty)
+    
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+        self.gpio.writes += 1
+    
+    def stop(self):
+        self.duty = None
+
+
+class FakeLCD:
+    """
+    In-memory 16x2 character LCD with the RPLCD CharLCD interface
+    
+    `transfers` counts bus transfers the way an HD44780 sees them: one per
+    character, cursor move or clear.
+    """
+    
+    def __init__(self, cols=LCD_COLS, rows=LCD_ROWS):
+        self.cols = cols
+        self.rows = rows
+        self.transfers = 0
+        self.clear()
+    
+    @property
+    def cursor_pos(self):
+        return self._cursor
+    
+    @cursor_pos.setter
+    def cursor_pos(self, pos):
+        self._cursor = pos
+        self.transfers += 1
+    
+    def clear(self):
+        self.lines = [[" "] * self.cols for _ in range(self.rows)]
+        self._cursor = (0, 0)
+        self.transfers += 1
+    
+    def write_string(self, text):
+        row, col = self._cursor
+        for char in text:
+            if row < self.rows and col < self.cols:
+                self.lines[row][col] = char
+            col += 1
+        self._cursor = (row, col)
+        self.transfers += len(text)
+    
+    @property
+    def text(self):
+        """Displayed rows as strings"""
+        return ["".join(line) for line in self.lines]
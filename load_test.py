@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Load test for the web interface
+Drives simulated clients against /status while a DSP loop runs, and
+reports request latency and the DSP frame rate with and without load
+"""
+
+import argparse
+import http.client
+import logging
+import multiprocessing
+import threading
+import time
+import numpy as np
+from config import NUM_SAMPLES, SAMPLING_RATE
+from pitch import create_detector
+from state import AppState
+from web_interface import WebInterface
+
+
+def run_clients(host, port, clients, duration, interval, results):
+    """
+    Client process: `clients` threads polling /status
+    
+    Each request opens a new connection, like a phone browser polling
+    over Wi-Fi, and waits `interval` seconds before the next one (0 for
+    back-to-back). Puts (latencies, errors) on the results queue.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    
+    def client():
+        mine = []
+        etag = None
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+                headers = {"If-None-Match": etag} if etag else {}
+                conn.request("GET", "/status", headers=headers)
+                response = conn.getresponse()
+                response.read()
+                etag = response.getheader("ETag", etag)
+                conn.close()
+                if response.status not in (200, 304):
+                    raise OSError(response.status)
+                mine.append(time.perf_counter() - start)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+            time.sleep(interval)
+        with lock:
+            latencies.extend(mine)
+    
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+class DspLoop:
+    """Stand-in for the tuner loop: detect pitch back to back and count frames"""
+    
+    def __init__(self, state):
+        self.state = state
+        self.detector = create_detector()
+        t = np.arange(NUM_SAMPLES) / SAMPLING_RATE
+        self.samples = (8000 * np.sin(2 * np.pi * 110 * t)).astype(np.int16)
+        self.frames = 0
+        self._running = False
+    
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        scale = 1 / 32768.0
+        while self._running:
+            freq, _ = self.detector.detect(self.samples * scale)
+            # Publish a changing reading, as the real loop does
+            cents = 1200 * np.log2(freq / 110.0) + (self.frames % 20 - 10)
+            self.state.update_detection("A2", cents)
+            self.frames += 1
+    
+    def stop(self):
+        self._running = False
+        self._thread.join()
+    
+    def frame_rate(self, seconds):
+        """Frames per second over the next `seconds`"""
+        start = self.frames
+        time.sleep(seconds)
+        return (self.frames - start) / seconds
+
+
+def percentile(values, q):
+    """q-th percentile of latencies in seconds, in milliseconds"""
+    return float(np.percentile(values, q) * 1000) if values else float("nan")
+
+
+def run_mode(mode, args):
+    """Benchmark one server mode and print the results"""
+    state = AppState()
+    state.set_instrument("6")
+    state.change_screen("tuner")
+    web = WebInterface(state)
+    web.start(mode=mode, host=args.host, port=args.port)
+    time.sleep(1.0)
+    
+    dsp = DspLoop(state)
+    dsp.start()
+    idle_fps = dsp.frame_rate(args.settle)
+    
+    # Spread the clients over a few processes so their own GIL does not
+    # count against the server
+    results = multiprocessing.Queue()
+    per_process = [len(range(i, args.clients, args.processes)) for i in range(args.processes)]
+    procs = [
+        multiprocessing.Process(
+            target=run_clients,
+            args=(args.host, args.port, n, args.duration, args.interval, results)
+        )
+        for n in per_process if n
+    ]
+    for proc in procs:
+        proc.start()
+    time.sleep(min(1.0, args.duration / 4))
+    loaded_fps = dsp.frame_rate(args.duration / 2)
+    
+    latencies, errors = [], 0
+    for _ in procs:
+        lat, err = results.get()
+        latencies.extend(lat)
+        errors += err
+    for proc in procs:
+        proc.join()
+    dsp.stop()
+    web.stop()
+    
+    requests = len(latencies)
+    print(f"{mode:12s} {args.clients:4d} clients  "
+          f"{requests / args.duration:7.0f} req/s  "
+          f"p50 {percentile(latencies, 50):6.1f} ms  "
+          f"p99 {percentile(latencies, 99):7.1f} ms  "
+          f"errors {errors:4d}  "
+          f"DSP {idle_fps:6.1f} -> {loaded_fps:6.1f} fps "
+          f"({100 * (loaded_fps / idle_fps - 1):+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the tuner web interface")
+    parser.add_argument("--mode", choices=["development", "pooled", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=30)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.3,
+                        help="Seconds between a client's requests (the page polls every 0.3 s)")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Seconds to measure the idle DSP frame rate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    args = parser.parse_args()
+    
+    # Per-request access logs would swamp the report
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    
+    print("=" * 60)
+    print("Guitar Tuner - Web Load Test")
+    print("=" * 60)
+    
+    modes = ["development", "pooled"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        run_mode(mode, args)
+        args.port += 1
+
+
+if __name__ == "__main__":
+    main()
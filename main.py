@@ -7,12 +7,15 @@ Ties together all modules and runs the main control loop
 import time
 from hardware import HardwareController
 from audio import AudioProcessor
-from tuning import TuningManager
+from tuning import TuningManager, CHROMATIC_SCALE
 from state import AppState
 from web_interface import WebInterface
+from worker import create_pitch_worker
+from metrics import METRICS
 from config import (
     BTN_LEFT, BTN_RIGHT, BTN_ENTER, BTN_BACK,
-    THRESHOLD_PERFECT, THRESHOLD_CLOSE
+    THRESHOLD_PERFECT,
+    DSP_BACKEND, WEB_PORT, TUNER_LOOP_SLEEP, MENU_IDLE_TIMEOUT
 )
 
 
@@ -24,17 +27,27 @@ class GuitarTuner:
         
         # Initialize all components
         self.hardware = HardwareController()
-        self.audio = AudioProcessor()
         self.state = AppState()
         self.web = WebInterface(self.state)
         
+        # Pitch detection pipeline (inline, worker thread or DSP process;
+        # the process backend opens its own audio stream)
+        self.audio = AudioProcessor() if DSP_BACKEND != "process" else None
+        self.pitch = create_pitch_worker(self.audio)
+        
         # Start web server
         self.web.start()
-        print("Web interface started on port 5000")
+        print(f"Web interface started on port {WEB_PORT}")
         
         # Local navigation state for guitar selection
         self.guitar_options = ["6", "8"]
         self.guitar_index = 0
+        
+        # AppState.display_version last drawn on the LCD
+        self._drawn_version = None
+        
+        # State changes from the web interface wake an idle menu loop
+        self.state.add_listener(self.hardware.wake)
     
     def run(self):
         """Main application loop"""
@@ -42,23 +55,44 @@ class GuitarTuner:
             print("Guitar Tuner ready!")
             
             while True:
+                loop_start = METRICS.start()
+                
                 # Update LCD if needed
-                if self.state.update_lcd:
-                    self._update_display()
-                    self.state.update_lcd = False
+                snapshot = self.state.snapshot
+                if snapshot.display_version != self._drawn_version:
+                    self._drawn_version = snapshot.display_version
+                    self._update_display(snapshot)
+                
+                # Button presses queued by the GPIO edge callbacks
+                buttons = self.hardware.get_button_events()
+                
+                # Handle current screen (handlers work from this
+                # iteration's snapshot, not a fresh read of the state)
+                if snapshot.current_screen == "select_guitar":
+                    self.pitch.clear_target()
+                    self._handle_guitar_selection(buttons)
+                
+                elif snapshot.current_screen == "tuning_menu":
+                    self.pitch.clear_target()
+                    self._handle_tuning_menu(snapshot, buttons)
                 
-                # Handle current screen
-                if self.state.current_screen == "select_guitar":
-                    self._handle_guitar_selection()
+                elif snapshot.current_screen == "tuner":
+                    self._handle_tuner(snapshot, buttons)
                 
-                elif self.state.current_screen == "tuning_menu":
-                    self._handle_tuning_menu()
+                # Send LCD changes held back by the refresh rate cap
+                self.hardware.refresh_display()
                 
-                elif self.state.current_screen == "tuner":
-                    self._handle_tuner()
+                # Push state changes to web clients on /events
+                self.web.publish()
+                METRICS.loop_done(loop_start)
                 
-                # Small sleep to prevent CPU hogging
-                time.sleep(0.01)
+                if snapshot.current_screen == "tuner":
+                    # Poll the pitch pipeline
+                    time.sleep(TUNER_LOOP_SLEEP)
+                else:
+                    # Menus only change on input: sleep until a button
+                    # press or a state change (audio capture is paused)
+                    self.hardware.wait_for_input(MENU_IDLE_TIMEOUT)
         
         except KeyboardInterrupt:
             print("\nShutting down...")
@@ -66,139 +100,138 @@ class GuitarTuner:
         finally:
             self.cleanup()
     
-    def _update_display(self):
+    def _update_display(self, snapshot):
         """Update LCD based on current screen"""
-        if self.state.current_screen == "select_guitar":
+        if snapshot.current_screen == "select_guitar":
             self.hardware.show_guitar_select()
         
-        elif self.state.current_screen == "tuning_menu":
-            tunings_list = TuningManager.get_tunings_list(self.state.instrument)
-            tuning_name = tunings_list[self.state.selected_tuning_index]
-            self.hardware.show_tuning_menu(self.state.instrument, tuning_name)
+        elif snapshot.current_screen == "tuning_menu":
+            tunings_list = TuningManager.get_tunings_list(snapshot.instrument)
+            tuning_name = tunings_list[snapshot.selected_tuning_index]
+            self.hardware.show_tuning_menu(snapshot.instrument, tuning_name)
         
-        elif self.state.current_screen == "tuner":
-            max_str = TuningManager.get_max_strings(self.state.instrument)
+        elif snapshot.current_screen == "tuner":
+            tunings_list = TuningManager.get_tunings_list(snapshot.instrument)
+            self._show_tuner(snapshot, tunings_list[snapshot.selected_tuning_index])
+    
+    def _show_tuner(self, snapshot, tuning_name):
+        """Render the tuner screen for a tuning (or chromatic mode)"""
+        if TuningManager.is_chromatic(tuning_name):
+            self.hardware.show_chromatic(
+                CHROMATIC_SCALE.lcd_line(snapshot.last_note),
+                cents=snapshot.last_cents
+            )
+        else:
             self.hardware.show_tuner(
-                note=self.state.last_note,
-                cents=self.state.last_cents,
-                string_num=self.state.current_string_index + 1,
-                max_str=max_str
+                note=snapshot.last_note,
+                cents=snapshot.last_cents,
+                string_num=snapshot.current_string_index + 1,
+                max_str=TuningManager.get_max_strings(snapshot.instrument)
             )
     
-    def _handle_guitar_selection(self):
+    def _handle_guitar_selection(self, buttons):
         """Handle guitar selection screen logic"""
-        # Update display with current selection
-        self.hardware.write_text(f"{self.guitar_options[self.guitar_index]}-String".ljust(16), row=1, col=0)
+        # Handle button presses (presses after a screen change are dropped)
+        for button in buttons:
+            if button == BTN_LEFT:
+                self.guitar_index = (self.guitar_index - 1) % len(self.guitar_options)
+            
+            elif button == BTN_RIGHT:
+                self.guitar_index = (self.guitar_index + 1) % len(self.guitar_options)
+            
+            elif button == BTN_ENTER:
+                self.state.set_instrument(self.guitar_options[self.guitar_index], screen="tuning_menu")
+                return
         
-        # Handle button presses
-        if self.hardware.is_button_pressed(BTN_LEFT):
-            self.guitar_index = (self.guitar_index - 1) % len(self.guitar_options)
-            self.hardware.wait_button_release(BTN_LEFT)
-        
-        if self.hardware.is_button_pressed(BTN_RIGHT):
-            self.guitar_index = (self.guitar_index + 1) % len(self.guitar_options)
-            self.hardware.wait_button_release(BTN_RIGHT)
-        
-        if self.hardware.is_button_pressed(BTN_ENTER):
-            self.state.set_instrument(self.guitar_options[self.guitar_index])
-            self.state.change_screen("tuning_menu")
-            self.hardware.wait_button_release(BTN_ENTER)
+        # Update display with current selection (after the presses, since
+        # a local index change does not wake the idle menu loop)
+        self.hardware.write_text(f"{self.guitar_options[self.guitar_index]}-String".ljust(16), row=1, col=0)
     
-    def _handle_tuning_menu(self):
+    def _handle_tuning_menu(self, snapshot, buttons):
         """Handle tuning menu screen logic"""
-        tunings_list = TuningManager.get_tunings_list(self.state.instrument)
+        tunings_list = TuningManager.get_tunings_list(snapshot.instrument)
         
         # Handle button presses
-        if self.hardware.is_button_pressed(BTN_LEFT):
-            self.state.navigate_tuning(-1, len(tunings_list))
-            self.hardware.wait_button_release(BTN_LEFT)
-        
-        if self.hardware.is_button_pressed(BTN_RIGHT):
-            self.state.navigate_tuning(1, len(tunings_list))
-            self.hardware.wait_button_release(BTN_RIGHT)
-        
-        if self.hardware.is_button_pressed(BTN_ENTER):
-            self.state.reset_tuning_state()
-            self.state.change_screen("tuner")
-            self.hardware.wait_button_release(BTN_ENTER)
-        
-        if self.hardware.is_button_pressed(BTN_BACK):
-            self.state.instrument = None
-            self.state.reset_tuning_state()
-            self.state.change_screen("select_guitar")
-            self.hardware.wait_button_release(BTN_BACK)
+        for button in buttons:
+            if button == BTN_LEFT:
+                self.state.navigate_tuning(-1, len(tunings_list))
+            
+            elif button == BTN_RIGHT:
+                self.state.navigate_tuning(1, len(tunings_list))
+            
+            elif button == BTN_ENTER:
+                self.state.reset_tuning_state(screen="tuner")
+                return
+            
+            elif button == BTN_BACK:
+                self.state.clear_instrument(screen="select_guitar")
+                return
     
-    def _handle_tuner(self):
+    def _handle_tuner(self, snapshot, buttons):
         """Handle tuner screen logic"""
-        max_str = TuningManager.get_max_strings(self.state.instrument)
-        tunings_list = TuningManager.get_tunings_list(self.state.instrument)
-        tuning_name = tunings_list[self.state.selected_tuning_index]
+        max_str = TuningManager.get_max_strings(snapshot.instrument)
+        tunings_list = TuningManager.get_tunings_list(snapshot.instrument)
+        tuning_name = tunings_list[snapshot.selected_tuning_index]
         
-        # Check for special auto-detection mode (6-string E Standard)
-        auto_detect = (self.state.instrument == "6" and tuning_name == "E Standard")
+        # Chromatic mode follows any note; auto-detection of the closest
+        # string is the special 6-string E Standard mode
+        chromatic = TuningManager.is_chromatic(tuning_name)
+        auto_detect = chromatic or (snapshot.instrument == "6" and tuning_name == "E Standard")
         
         # Handle navigation (disabled in auto mode)
-        if self.hardware.is_button_pressed(BTN_LEFT):
-            if not auto_detect:
+        for button in buttons:
+            if button == BTN_LEFT and not auto_detect:
                 self.state.navigate_string(-1, max_str)
-            self.hardware.wait_button_release(BTN_LEFT)
-        
-        if self.hardware.is_button_pressed(BTN_RIGHT):
-            if not auto_detect:
+            
+            elif button == BTN_RIGHT and not auto_detect:
                 self.state.navigate_string(1, max_str)
-            self.hardware.wait_button_release(BTN_RIGHT)
-        
-        if self.hardware.is_button_pressed(BTN_BACK):
-            self.state.change_screen("tuning_menu")
-            self.hardware.wait_button_release(BTN_BACK)
-        
-        # Audio processing
-        freq = self.audio.detect_pitch()
-        
-        if auto_detect:
-            # Auto-detect closest string
-            idx, note, target_freq, cents = TuningManager.find_closest_string(freq, tuning_name)
-            if idx is not None:
-                self.state.set_string_index(idx)
-        else:
-            # Manual string selection
-            order = TuningManager.get_string_order(tuning_name)
-            if self.state.current_string_index < len(order):
-                note, target_freq = order[self.state.current_string_index]
-                cents = AudioProcessor.freq_to_cents(freq, target_freq)
-            else:
-                note, target_freq, cents = None, None, None
-        
-        # Update LED feedback
-        if cents is not None:
-            abs_cents = abs(cents)
-            if abs_cents <= THRESHOLD_PERFECT:
-                self.hardware.led_green()
-                if note:
-                    self.state.mark_string_tuned(note)
-            elif abs_cents <= THRESHOLD_CLOSE:
-                self.hardware.led_yellow()
-            else:
-                self.hardware.led_red()
-        else:
-            self.hardware.led_off()
+            
+            elif button == BTN_BACK:
+                self.state.change_screen("tuning_menu")
+                return
+        
+        # Audio processing (inline unless the worker thread owns it)
+        string_index = None if auto_detect else snapshot.current_string_index
+        target = (tuning_name, string_index, auto_detect)
+        self.pitch.set_target(*target)
+        if not self.pitch.running:
+            self.pitch.step()
+        reading = self.pitch.read(target)
+        note, cents = reading.note, reading.cents
+        
+        if auto_detect and not chromatic and reading.string_index is not None:
+            # Auto-detected closest string
+            self.state.set_string_index(reading.string_index)
+        
+        # Update LED feedback (GPIO is only written when the color changes)
+        start = METRICS.start()
+        self.hardware.led_cents(cents)
+        METRICS.stop("led_update", start)
+        if cents is not None and abs(cents) <= THRESHOLD_PERFECT and note and not chromatic:
+            self.state.mark_string_tuned(note)
         
         # Update state
         self.state.update_detection(note, cents)
         
-        # Update display
-        self.hardware.show_tuner(
-            note=self.state.last_note,
-            cents=self.state.last_cents,
-            string_num=self.state.current_string_index + 1,
-            max_str=max_str
-        )
+        # Update display with the new reading. If anything else changed
+        # since this iteration's snapshot (screen, instrument, string),
+        # the display version moved and the next pass redraws instead.
+        latest = self.state.snapshot
+        if latest.display_version == snapshot.display_version:
+            start = METRICS.start()
+            self._show_tuner(latest, tuning_name)
+            METRICS.stop("lcd_write", start)
+        if reading.frequency:
+            METRICS.reading_done(time.monotonic() - reading.timestamp)
     
     def cleanup(self):
         """Clean up resources"""
         print("Cleaning up...")
+        self.pitch.stop()
+        self.web.stop()
         self.hardware.cleanup()
-        self.audio.cleanup()
+        if self.audio is not None:
+            self.audio.cleanup()
         print("Goodbye!")
 
 
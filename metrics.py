@@ -0,0 +1,187 @@
+"""
+Metrics module
+Per-stage latency histograms exported in Prometheus text format
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from config import METRICS_ENABLED, METRICS_BUCKETS
+
+
+# Timed stages of the tuner pipeline
+STAGES = (
+    "audio_read",       # Waiting for / reading the audio frame
+    "conversion",       # int16 -> float, decimation, DC removal
+    "pitch_estimate",   # Autocorrelation / YIN / MPM / Goertzel core
+    "string_match",     # Matching the frequency to a string or note
+    "led_update",
+    "lcd_write",
+    "web_request",
+)
+
+# Frames used to estimate the analysis frame rate
+FRAME_RATE_WINDOW = 64
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram
+    
+    Memory is one counter per bucket no matter how many values are
+    observed. Buckets are cumulative on export, as Prometheus expects.
+    """
+    
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value):
+        """Record one value (in seconds)"""
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+    
+    def render(self, name, labels=""):
+        """Prometheus text lines for this histogram"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.bounds, counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {total:.9g}")
+        lines.append(f"{name}_count{suffix} {count}")
+        return lines
+
+
+class Metrics:
+    """
+    Timing probes for the tuner pipeline
+    
+    Probes are written as
+        
+        start = METRICS.start()
+        ...
+        METRICS.stop("conversion", start)
+    
+    When disabled, start() returns 0.0 and stop() returns at once, so a
+    probe costs two attribute checks and no clock reads.
+    """
+    
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.loop = Histogram()
+        self.reading_age = Histogram()
+        self.frames = 0
+        self._frame_times = deque(maxlen=FRAME_RATE_WINDOW)
+        self._counters = []
+    
+    def start(self):
+        """Start timing a stage"""
+        return time.perf_counter() if self.enabled else 0.0
+    
+    def stop(self, stage, start):
+        """
+        Record the time since start() for a stage
+        
+        Returns:
+            The current clock, so consecutive stages can be chained
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.stages[stage].observe(now - start)
+        return now
+    
+    def add_counters(self, prefix, read):
+        """
+        Export counters kept by another component
+        
+        Args:
+            prefix: Metric name prefix (e.g. "tuner_audio")
+            read: Callable returning a {name: value} dict of counters,
+                exported as <prefix>_<name>_total
+        """
+        self._counters.append((prefix, read))
+    
+    def loop_done(self, start):
+        """Record one main loop iteration"""
+        if self.enabled:
+            self.loop.observe(time.perf_counter() - start)
+    
+    def reading_done(self, age):
+        """
+        Record the age of a reading in seconds, from the capture of the
+        end of its analysis window to its display (so it includes the
+        DSP time)
+        """
+        if self.enabled:
+            self.reading_age.observe(age)
+    
+    def frame(self):
+        """Count one analyzed audio frame"""
+        if self.enabled:
+            self.frames += 1
+            self._frame_times.append(time.monotonic())
+    
+    @property
+    def frame_rate(self):
+        """Analyzed frames per second over the last FRAME_RATE_WINDOW frames"""
+        times = list(self._frame_times)
+        if len(times) < 2 or time.monotonic() - times[-1] > 1.0:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+    
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        lines = [
+            "# HELP tuner_stage_seconds Time spent in each pipeline stage",
+            "# TYPE tuner_stage_seconds histogram",
+        ]
+        for stage, histogram in self.stages.items():
+            lines += histogram.render("tuner_stage_seconds", f'stage="{stage}"')
+        
+        lines += [
+            "# HELP tuner_loop_iteration_seconds Main loop iteration time (excluding sleep)",
+            "# TYPE tuner_loop_iteration_seconds histogram",
+        ]
+        lines += self.loop.render("tuner_loop_iteration_seconds")
+        
+        lines += [
+            "# HELP tuner_reading_age_seconds Time from audio capture to display of a reading",
+            "# TYPE tuner_reading_age_seconds histogram",
+        ]
+        lines += self.reading_age.render("tuner_reading_age_seconds")
+        
+        lines += [
+            "# HELP tuner_frames_total Audio frames analyzed",
+            "# TYPE tuner_frames_total counter",
+            f"tuner_frames_total {self.frames}",
+            "# HELP tuner_frame_rate Audio frames analyzed per second",
+            "# TYPE tuner_frame_rate gauge",
+            f"tuner_frame_rate {self.frame_rate:.3f}",
+        ]
+        for prefix, read in self._counters:
+            for name, value in read().items():
+                lines += [
+                    f"# TYPE {prefix}_{name}_total counter",
+                    f"{prefix}_{name}_total {value}",
+                ]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide metrics registry
+METRICS = Metrics()
@@ -0,0 +1,802 @@
+"""
+Pitch detection module
+Pluggable fundamental frequency estimators (autocorrelation, YIN, McLeod)
+"""
+
+import numpy as np
+from config import (
+    NUM_SAMPLES, SAMPLING_RATE,
+    PITCH_DETECTOR, AUTOCORRELATION_ENGINE, YIN_THRESHOLD, MPM_CUTOFF,
+    DSP_DTYPE, DECIMATION_HEADROOM,
+    GOERTZEL_SPAN_CENTS, GOERTZEL_STEP_CENTS, GOERTZEL_HARMONICS,
+    NOISE_GATE_DB, NOISE_GATE_HYSTERESIS_DB, ONSET_RISE_DB, ONSET_HOLD,
+    NOISE_GATE_STRIDE
+)
+
+
+def _fft_supports_out():
+    """Check whether numpy.fft accepts out= (NumPy 2.0 and later)"""
+    try:
+        np.fft.rfft(np.zeros(4), out=np.empty(3, dtype=complex))
+        return True
+    except TypeError:
+        return False
+
+
+FFT_SUPPORTS_OUT = _fft_supports_out()
+
+
+class FFTAutocorrelator:
+    """
+    Autocorrelation via the Wiener-Khinchin theorem
+    
+    The signal is zero-padded to a power of two (at least 2N - 1 so the
+    circular correlation equals the linear one) and the padded input,
+    spectrum and output buffers are kept between frames. With NumPy 2.0+
+    the transforms write into them directly, so a frame allocates nothing.
+    """
+    
+    def __init__(self, num_samples=NUM_SAMPLES, dtype=DSP_DTYPE):
+        self.dtype = np.dtype(dtype)
+        self._allocate(num_samples)
+    
+    def _allocate(self, num_samples):
+        """Size scratch buffers for frames of num_samples"""
+        self.num_samples = num_samples
+        self.fft_size = 1 << (2 * num_samples - 1).bit_length()
+        bins = self.fft_size // 2 + 1
+        self._padded = np.zeros(self.fft_size, dtype=self.dtype)
+        self._spectrum = np.empty(bins, dtype=np.result_type(self.dtype, np.complex64))
+        self._power = np.empty(bins, dtype=self.dtype)
+        self._imag = np.empty(bins, dtype=self.dtype)
+        self._corr = np.empty(self.fft_size, dtype=self.dtype)
+    
+    def correlate(self, signal, lag_min=0, lag_max=None):
+        """
+        Compute the one-sided autocorrelation of a signal
+        
+        Args:
+            signal: Audio signal array
+            lag_min: First lag to return
+            lag_max: Last lag to return (None for N - 1)
+        
+        Returns:
+            Autocorrelation for lags lag_min..lag_max (same as the matching
+            slice of np.correlate(signal, signal, mode='full'))
+        """
+        n = len(signal)
+        if n != self.num_samples:
+            self._allocate(n)
+        if lag_max is None:
+            lag_max = n - 1
+        
+        self._padded[:n] = signal
+        if FFT_SUPPORTS_OUT:
+            spectrum = np.fft.rfft(self._padded, out=self._spectrum)
+        else:
+            spectrum = np.fft.rfft(self._padded)
+        
+        # |X|^2 = re^2 + im^2, built in the reusable buffers
+        np.multiply(spectrum.real, spectrum.real, out=self._power)
+        np.multiply(spectrum.imag, spectrum.imag, out=self._imag)
+        
+        if FFT_SUPPORTS_OUT:
+            # Feed irfft a complex array so it does not convert (and copy)
+            np.add(self._power, self._imag, out=spectrum.real)
+            spectrum.imag.fill(0)
+            corr = np.fft.irfft(spectrum, self.fft_size, out=self._corr)
+        else:
+            self._power += self._imag
+            corr = np.fft.irfft(self._power, self.fft_size)
+        return corr[lag_min:lag_max + 1]
+
+
+def direct_correlate(signal, lag_min=0, lag_max=None):
+    """
+    Compute the one-sided autocorrelation with np.correlate
+    
+    For a restricted lag window only the requested lags are computed,
+    each over its full N - lag overlap (the same values as the FFT
+    engine): the first N - lag_max samples are shared by every lag, and
+    the products beyond them are the autocorrelation of the last
+    lag_max samples.
+    """
+    n = len(signal)
+    if lag_max is None:
+        return np.correlate(signal, signal, mode='full')[n - 1 + lag_min:]
+    
+    width = n - lag_max
+    corr = np.correlate(signal[lag_min:], signal[:width], mode='valid')
+    if lag_max > lag_min:
+        tail = signal[width:]
+        corr[:-1] += np.correlate(tail, tail, mode='full')[lag_max - 1 + lag_min:]
+    return corr
+
+
+def parabolic_peak(values, index):
+    """
+    Refine an extremum position by fitting a parabola through its neighbours
+    
+    Args:
+        values: Array containing the extremum
+        index: Integer position of the extremum
+    
+    Returns:
+        Fractional position of the extremum
+    """
+    if index <= 0 or index >= len(values) - 1:
+        return float(index)
+    
+    left, centre, right = values[index - 1], values[index], values[index + 1]
+    denom = left - 2 * centre + right
+    if denom == 0:
+        return float(index)
+    return index + 0.5 * (left - right) / denom
+
+
+class Decimator:
+    """
+    Anti-aliased integer-factor decimation front-end
+    
+    A windowed-sinc low-pass FIR is applied in polyphase form: only every
+    factor-th output is computed, each as one dot product over a strided
+    view of the input, so the cost scales with the decimated length.
+    """
+    
+    TAPS_PER_PHASE = 48
+    
+    def __init__(self, factor, dtype=DSP_DTYPE):
+        self.factor = factor
+        self.dtype = np.dtype(dtype)
+        
+        # Low-pass at 80% of the output Nyquist frequency (Blackman window)
+        num_taps = self.TAPS_PER_PHASE * factor + 1
+        cutoff = 0.8 * 0.5 / factor
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(num_taps)
+        taps /= taps.sum()
+        
+        # Reversed so each output is a plain dot product with the input
+        self.taps = taps[::-1].astype(self.dtype)
+    
+    def output_length(self, num_samples):
+        """Number of decimated samples produced from num_samples"""
+        return max(0, (num_samples - len(self.taps)) // self.factor + 1)
+    
+    def process(self, signal):
+        """
+        Filter and decimate one frame
+        
+        Only fully overlapped outputs are kept, so frames need no filter
+        state between them.
+        
+        Args:
+            signal: Audio signal array at the input rate
+        
+        Returns:
+            Decimated signal array
+        """
+        windows = np.lib.stride_tricks.sliding_window_view(signal, len(self.taps))
+        return windows[::self.factor] @ self.taps
+    
+    def refine(self, signal, freq, rate=SAMPLING_RATE):
+        """
+        Refine a frequency found at the decimated rate on the full-rate frame
+        
+        One decimated lag spans `factor` input samples, and a peak picked
+        on the decimated autocorrelation can sit several of them off on
+        low strings. Starting from that period, this climbs the normalized
+        square difference function (which has no taper to bias the peak)
+        lag by lag at the input rate to its maximum, then refines it by a
+        parabola.
+        
+        Args:
+            signal: Zero-mean frame at the input rate
+            freq: Frequency found on the decimated frame, in Hz
+            rate: Input sampling rate in Hz
+        
+        Returns:
+            Refined frequency in Hz (freq itself if no maximum is found
+            within a quarter period)
+        """
+        n = len(signal)
+        period = rate / freq
+        energy = np.cumsum(signal * signal)
+        
+        def nsdf(lag):
+            overlap = energy[n - lag - 1] + energy[-1] - energy[lag - 1]
+            return 2 * np.dot(signal[:n - lag], signal[lag:]) / overlap if overlap > 0 else 0.0
+        
+        lowest, highest = max(2, int(0.75 * period)), min(n - 3, int(1.25 * period))
+        lag = int(round(period))
+        if not lowest <= lag <= highest:
+            return freq
+        
+        values = {lag: nsdf(lag)}
+        for step in (1, -1):
+            while lowest <= lag + step <= highest:
+                values[lag + step] = nsdf(lag + step)
+                if values[lag + step] <= values[lag]:
+                    break
+                lag += step
+        if lag in (lowest, highest):
+            return freq
+        
+        around = [values[l] if l in values else nsdf(l) for l in (lag - 1, lag, lag + 1)]
+        return rate / (lag - 1 + parabolic_peak(around, 1))
+    
+    @staticmethod
+    def factor_for(max_freq, rate=SAMPLING_RATE, headroom=DECIMATION_HEADROOM):
+        """
+        Pick the largest factor that keeps `headroom` harmonics of
+        max_freq below the decimated Nyquist frequency
+        """
+        return max(1, int(rate / (2 * headroom * max_freq)))
+
+
+class NoiseGate:
+    """
+    Energy gate and pluck-onset detector for int16 frames
+    
+    The level of each frame is the RMS (DC removed) of its newest
+    samples, taken over every stride-th sample and compared in the power
+    domain so no logarithm is taken. The gate has three states:
+    
+        "silent"  - below the threshold, nothing to analyze
+        "attack"  - within `hold` seconds of an onset (the gate opening
+                    or the level jumping by `rise_db`), the pick transient
+        "sustain" - a steady note, analyze it
+    """
+    
+    SILENT, ATTACK, SUSTAIN = "silent", "attack", "sustain"
+    
+    def __init__(self, threshold_db=NOISE_GATE_DB, hysteresis_db=NOISE_GATE_HYSTERESIS_DB,
+                 rise_db=ONSET_RISE_DB, hold=ONSET_HOLD, rate=SAMPLING_RATE,
+                 stride=NOISE_GATE_STRIDE, num_samples=NUM_SAMPLES):
+        self.open_power = 10 ** (threshold_db / 10)
+        self.close_power = 10 ** ((threshold_db - hysteresis_db) / 10)
+        self.rise = 10 ** (rise_db / 10)
+        self.hold_samples = int(hold * rate)
+        self.stride = stride
+        self.state = self.SILENT
+        self.power = 0.0
+        self.onsets = 0
+        self._since_onset = 0
+        self._buf = np.empty(num_samples // stride + 1, dtype=np.float32)
+    
+    def reset(self):
+        """Forget the previous level (e.g. after capture was paused)"""
+        self.state = self.SILENT
+        self.power = 0.0
+        self._since_onset = 0
+    
+    def level(self, samples):
+        """Mean power of an int16 frame relative to full scale"""
+        view = samples[::self.stride]
+        n = len(view)
+        if n > len(self._buf):
+            self._buf = np.empty(n, dtype=np.float32)
+        buf = self._buf[:n]
+        np.multiply(view, np.float32(1 / 32768.0), out=buf)
+        mean = float(buf.sum()) / n
+        return float(np.dot(buf, buf)) / n - mean * mean
+    
+    def update(self, samples, advance):
+        """
+        Classify a frame
+        
+        Args:
+            samples: int16 analysis frame
+            advance: New samples since the previous frame
+        
+        Returns:
+            True if the frame should be analyzed (gate state "sustain")
+        """
+        # Level of the newest samples only, so an onset shows up at once
+        # even when consecutive frames overlap
+        newest = samples[-advance:] if 0 < advance < len(samples) else samples
+        power = self.level(newest)
+        previous, self.power = self.power, power
+        
+        if self.state == self.SILENT:
+            if power < self.open_power:
+                return False
+            onset = True
+        elif power < self.close_power:
+            self.state = self.SILENT
+            return False
+        else:
+            onset = power > previous * self.rise
+        
+        if onset:
+            self.state = self.ATTACK
+            self.onsets += 1
+            self._since_onset = 0
+            return False
+        
+        if self.state == self.ATTACK:
+            self._since_onset += advance
+            if self._since_onset < self.hold_samples:
+                return False
+            self.state = self.SUSTAIN
+        return True
+
+
+class PitchDetector:
+    """
+    Base class for pitch detectors
+    
+    A frame goes in, a (frequency, confidence) pair comes out. Frequency
+    is 0 when no pitch was found; confidence is in the range 0..1.
+    """
+    
+    name = None
+    
+    def __init__(self, rate=SAMPLING_RATE, num_samples=NUM_SAMPLES, dtype=DSP_DTYPE):
+        self.rate = rate
+        self.num_samples = num_samples
+        self.dtype = np.dtype(dtype)
+        self._work = np.empty(num_samples, dtype=self.dtype)
+        self.clear_search_range()
+    
+    @property
+    def max_lag(self):
+        """Largest lag the estimator can use for this frame size"""
+        return self.num_samples - 2
+    
+    def set_search_range(self, min_freq, max_freq):
+        """
+        Restrict the pitch search to a frequency band
+        
+        Only lags whose period falls inside the band are evaluated,
+        which cuts the per-frame cost and rules out octave errors
+        outside the band.
+        
+        Args:
+            min_freq: Lowest frequency of interest in Hz
+            max_freq: Highest frequency of interest in Hz
+        """
+        lag_max = min(self.max_lag, int(np.ceil(self.rate / min_freq)))
+        lag_min = max(1, int(self.rate / max_freq))
+        self._lag_min = min(lag_min, lag_max)
+        self._lag_max = lag_max
+    
+    def clear_search_range(self):
+        """Search every lag of the frame again"""
+        self._lag_min = 0
+        self._lag_max = None
+    
+    def _outside_band(self, lag):
+        """
+        True if a peak lag lies on the far edge of a restricted window
+        
+        The estimators pick the best lag they searched, so a peak on the
+        last lag means the period lies beyond it, outside the band.
+        """
+        return self._lag_max is not None and lag >= self._lag_max
+    
+    def detect(self, signal):
+        """
+        Estimate the fundamental frequency of a frame
+        
+        Args:
+            signal: Audio signal array
+        
+        Returns:
+            Tuple of (frequency in Hz, confidence)
+        """
+        return self.estimate(self.prepare(signal))
+    
+    def detect_pcm(self, samples):
+        """
+        Estimate the fundamental frequency of a frame of int16 PCM samples
+        
+        Args:
+            samples: int16 sample array
+        
+        Returns:
+            Tuple of (frequency in Hz, confidence)
+        """
+        return self.estimate(self.prepare_pcm(samples))
+    
+    def prepare(self, signal):
+        """
+        Remove the DC offset of a float frame
+        
+        Returns:
+            Frame ready for estimate(), or None if it is silent
+        """
+        signal = signal - np.mean(signal)
+        if not signal.any():
+            return None
+        return signal
+    
+    def prepare_pcm(self, samples):
+        """
+        Convert int16 PCM samples and remove the DC offset
+        
+        Conversion and DC removal happen in place in a preallocated work
+        buffer, so the frame itself causes no new arrays.
+        
+        Returns:
+            Frame ready for estimate() (a view of the work buffer), or
+            None if it is silent
+        """
+        n = len(samples)
+        if n > len(self._work):
+            self._work = np.empty(n, dtype=self.dtype)
+        signal = self._work[:n]
+        
+        # Plain cast + in-place scale; a mixed-type multiply would need
+        # a casting buffer
+        np.copyto(signal, samples, casting='unsafe')
+        if signal.max() == signal.min():
+            return None
+        signal *= self.dtype.type(1 / 32768.0)
+        signal -= signal.mean()
+        return signal
+    
+    def estimate(self, signal):
+        """
+        Run the estimator on a prepared frame
+        
+        Returns:
+            Tuple of (frequency in Hz, confidence); (0, 0.0) for None
+        """
+        if signal is None:
+            return 0, 0.0
+        return self._estimate(signal)
+    
+    def _estimate(self, signal):
+        """Estimate pitch of a zero-mean frame"""
+        raise NotImplementedError
+
+
+class AutocorrelationDetector(PitchDetector):
+    """First-peak autocorrelation estimator (the original tuner algorithm)"""
+    
+    name = "autocorrelation"
+    
+    def __init__(self, rate=SAMPLING_RATE, num_samples=NUM_SAMPLES,
+                 dtype=DSP_DTYPE, engine=AUTOCORRELATION_ENGINE, interpolate=None):
+        super().__init__(rate, num_samples, dtype)
+        
+        # Lags are coarse at decimated rates, so refine the peak there
+        self.interpolate = rate < SAMPLING_RATE if interpolate is None else interpolate
+        
+        # Select autocorrelation engine
+        if engine == "fft":
+            self._correlate = FFTAutocorrelator(num_samples, dtype).correlate
+        else:
+            self._correlate = direct_correlate
+        
+        # Peak search scratch buffers
+        self._diff = np.empty(num_samples, dtype=self.dtype)
+        self._rising = np.empty(num_samples, dtype=bool)
+    
+    def _estimate(self, signal):
+        # Compute autocorrelation over the search window
+        lag_min, lag_max = self._lag_min, self._lag_max
+        corr = self._correlate(signal, lag_min, lag_max)
+        
+        # Find the first peak (first rising lag, then the highest value after it)
+        m = len(corr) - 1
+        if m <= 0:
+            return 0, 0.0
+        if m > len(self._diff):
+            self._diff = np.empty(m, dtype=self.dtype)
+            self._rising = np.empty(m, dtype=bool)
+        
+        d = np.subtract(corr[1:], corr[:-1], out=self._diff[:m])
+        rising = np.greater(d, 0, out=self._rising[:m])
+        start = int(rising.argmax())
+        if not rising[start]:
+            return 0, 0.0
+        
+        peak = int(corr[start:].argmax()) + start
+        if self._outside_band(peak + lag_min):
+            return 0, 0.0
+        
+        # Confidence is the peak height relative to the frame energy
+        energy = np.dot(signal, signal)
+        confidence = min(max(float(corr[peak] / energy), 0.0), 1.0) if energy > 0 else 0.0
+        
+        if self.interpolate and 0 < peak < m:
+            # Fit on the unbiased (taper-corrected) neighbourhood, or the
+            # taper drags the refined peak toward shorter lags
+            lags = np.arange(peak - 1, peak + 2) + lag_min
+            peak = parabolic_peak(corr[peak - 1:peak + 2] / (len(signal) - lags), 1) + peak - 1
+        peak += lag_min
+        
+        # Calculate frequency
+        return (self.rate / peak if peak != 0 else 0), confidence
+
+
+class YinDetector(PitchDetector):
+    """
+    YIN estimator (de Cheveigne & Kawahara, 2002)
+    
+    The difference function is built from one FFT cross-correlation and
+    a running energy sum, so every lag is evaluated without Python loops.
+    """
+    
+    name = "yin"
+    
+    def __init__(self, rate=SAMPLING_RATE, num_samples=NUM_SAMPLES,
+                 dtype=DSP_DTYPE, threshold=YIN_THRESHOLD):
+        super().__init__(rate, num_samples, dtype)
+        self.threshold = threshold
+        self._fft_size = 1 << (2 * num_samples - 1).bit_length()
+    
+    @property
+    def max_lag(self):
+        # The integration window needs at least as many samples as the lag
+        return self.num_samples // 2
+    
+    def _difference(self, signal, tau_max):
+        """Compute the YIN difference function d(tau) for tau = 0..tau_max"""
+        width = len(signal) - tau_max
+        
+        # Cross-correlation of the integration window with the whole frame
+        frame = np.fft.rfft(signal, self._fft_size)
+        window = np.fft.rfft(signal[:width], self._fft_size)
+        cross = np.fft.irfft(frame * np.conj(window), self._fft_size)[:tau_max + 1]
+        
+        # Energy of the window shifted by tau
+        energy = np.concatenate((np.zeros(1, signal.dtype), np.cumsum(signal * signal)))
+        shifted = energy[width:width + tau_max + 1] - energy[:tau_max + 1]
+        
+        return energy[width] + shifted - 2 * cross
+    
+    def _estimate(self, signal):
+        tau_max = self.max_lag if self._lag_max is None else self._lag_max
+        tau_min = max(2, self._lag_min)
+        if tau_max <= tau_min:
+            return 0, 0.0
+        
+        diff = self._difference(signal, tau_max)
+        
+        # Cumulative mean normalized difference d'(tau)
+        cmnd = np.ones_like(diff)
+        running = np.cumsum(diff[1:])
+        np.divide(diff[1:] * np.arange(1, tau_max + 1, dtype=diff.dtype), running,
+                  out=cmnd[1:], where=running > 0)
+        
+        # First dip below the threshold, followed down to its local minimum
+        search = cmnd[tau_min:tau_max + 1]
+        below = np.flatnonzero(search < self.threshold)
+        if len(below):
+            tau = below[0]
+            rising = np.flatnonzero(np.diff(search[tau:]) >= 0)
+            tau += rising[0] if len(rising) else len(search) - 1 - tau
+        else:
+            tau = int(np.argmin(search))
+        tau += tau_min
+        if self._outside_band(tau):
+            return 0, 0.0
+        
+        confidence = float(np.clip(1 - cmnd[tau], 0, 1))
+        period = parabolic_peak(cmnd, tau)
+        return (self.rate / period if period > 0 else 0), confidence
+
+
+class McLeodDetector(PitchDetector):
+    """
+    McLeod Pitch Method (McLeod & Wyvill, 2005)
+    
+    Picks the first key maximum of the normalized square difference
+    function that reaches MPM_CUTOFF times the highest key maximum.
+    """
+    
+    name = "mpm"
+    
+    def __init__(self, rate=SAMPLING_RATE, num_samples=NUM_SAMPLES,
+                 dtype=DSP_DTYPE, cutoff=MPM_CUTOFF):
+        super().__init__(rate, num_samples, dtype)
+        self.cutoff = cutoff
+        self._autocorrelator = FFTAutocorrelator(num_samples, dtype)
+    
+    @property
+    def max_lag(self):
+        # The NSDF removes the taper, but the overlap must stay meaningful
+        return self.num_samples * 3 // 4
+    
+    def _nsdf(self, signal, tau_max):
+        """Compute the normalized square difference function for tau = 0..tau_max"""
+        n = len(signal)
+        corr = self._autocorrelator.correlate(signal, 0, tau_max)
+        
+        # m'(tau) = sum over the overlap of x[j]^2 + x[j + tau]^2
+        energy = np.concatenate((np.zeros(1, signal.dtype), np.cumsum(signal * signal)))
+        lags = np.arange(tau_max + 1)
+        norm = energy[n - lags] + (energy[n] - energy[lags])
+        
+        nsdf = np.zeros_like(corr)
+        np.divide(2 * corr, norm, out=nsdf, where=norm > 0)
+        return nsdf
+    
+    def _estimate(self, signal):
+        tau_max = self.max_lag if self._lag_max is None else self._lag_max
+        nsdf = self._nsdf(signal, tau_max)
+        
+        # Skip the lobe around lag zero, then apply the search window
+        negative = np.flatnonzero(nsdf <= 0)
+        if len(negative) == 0:
+            return 0, 0.0
+        start = max(negative[0], self._lag_min)
+        segment = nsdf[start:]
+        
+        # Positive lobes between positive- and negative-going zero crossings
+        positive = (segment > 0).astype(np.int8)
+        edges = np.diff(positive)
+        starts = np.flatnonzero(edges == 1) + 1
+        if positive[0]:
+            starts = np.concatenate(([0], starts))
+        if len(starts) == 0:
+            return 0, 0.0
+        
+        # Key maximum of every lobe (each span runs to the next lobe)
+        heights = np.maximum.reduceat(segment, starts)
+        
+        # First key maximum close enough to the highest one
+        chosen = np.flatnonzero(heights >= self.cutoff * heights.max())[0]
+        bounds = np.append(starts, len(segment))
+        lobe = segment[bounds[chosen]:bounds[chosen + 1]]
+        tau = int(np.argmax(lobe)) + bounds[chosen] + start
+        if self._outside_band(tau):
+            return 0, 0.0
+        
+        confidence = float(np.clip(nsdf[tau], 0, 1))
+        period = parabolic_peak(nsdf, tau)
+        return (self.rate / period if period > 0 else 0), confidence
+
+
+class GoertzelDetector(PitchDetector):
+    """
+    Targeted filter-bank estimator for a known note
+    
+    Evaluates a bank of Hann-windowed single-bin DFTs (what a Goertzel
+    filter computes per bin) spanning +/- GOERTZEL_SPAN_CENTS around the
+    target and its first harmonics. For each candidate pitch the bins are
+    turned into a weighted least-squares fit of the harmonics plus DC, so
+    the mirror image of each harmonic and the DC left over from a few
+    periods of a low string do not pull the peak. The fitted energy is
+    refined by a parabola through its log.
+    
+    Bin phasors are stored factored, one row of block_size samples times
+    one row of per-block steps, so a new target costs a few thousand
+    complex exponentials instead of a dense bank of num_samples columns.
+    """
+    
+    name = "goertzel"
+    
+    def __init__(self, rate=SAMPLING_RATE, num_samples=NUM_SAMPLES, dtype=DSP_DTYPE,
+                 span_cents=GOERTZEL_SPAN_CENTS, step_cents=GOERTZEL_STEP_CENTS,
+                 harmonics=GOERTZEL_HARMONICS):
+        super().__init__(rate, num_samples, dtype)
+        self.step_cents = step_cents
+        self.harmonics = harmonics
+        self.offsets = np.arange(-span_cents, span_cents + step_cents / 2, step_cents)
+        self.target = None
+        self._window = np.hanning(num_samples).astype(self.dtype)
+        
+        # Windowed frame, zero-padded to whole blocks
+        self.block_size = int(np.ceil(np.sqrt(num_samples)))
+        self._blocks = -(-num_samples // self.block_size)
+        self._windowed = np.zeros(self._blocks * self.block_size, dtype=self.dtype)
+        self._phasors = None
+    
+    def _bin_phasors(self, freqs):
+        """Factored DFT phasors (block row, block steps) for each frequency"""
+        omega = -2j * np.pi * np.reshape(freqs, (-1, 1)) / self.rate
+        head = np.exp(omega * np.arange(self.block_size))
+        steps = np.exp(omega * self.block_size * np.arange(self._blocks))
+        return head, steps
+    
+    def _dft(self, phasors, padded):
+        """DFT bins of a block-padded frame"""
+        head, steps = phasors
+        partial = head @ padded.reshape(self._blocks, self.block_size).T
+        return np.einsum('rj,rj->r', partial, steps)
+    
+    def set_target(self, freq):
+        """
+        Build the filter bank around a target frequency
+        
+        Args:
+            freq: Target frequency in Hz, or None to release the bank
+        """
+        if freq == self.target:
+            return
+        self.target = freq
+        if freq is None:
+            self._phasors = None
+            return
+        
+        # Bin frequencies: harmonics x cent offsets
+        h = self.harmonics
+        orders = np.arange(1, h + 1)
+        base = freq * 2 ** (self.offsets / 1200)
+        freqs = orders[:, None] * base[None, :]
+        complex_type = np.result_type(self.dtype, np.complex64)
+        self._phasors = tuple(p.astype(complex_type) for p in self._bin_phasors(freqs))
+        
+        # Gram matrix of the fit basis (cos and sin of each harmonic, then
+        # DC) per candidate, from the window's DFT at multiples 0..2h of
+        # the candidate: cos(a)cos(b) = (cos(a-b) + cos(a+b)) / 2 etc.
+        padded = np.zeros_like(self._windowed, dtype=np.float64)
+        padded[:self.num_samples] = self._window
+        multiples = np.arange(2 * h + 1)[:, None] * base[None, :]
+        spectrum = self._dft(self._bin_phasors(multiples), padded).reshape(2 * h + 1, -1).T
+        wcos, wsin = spectrum.real, -spectrum.imag
+        
+        diff = np.abs(orders[:, None] - orders[None, :])
+        sign = np.sign(orders[:, None] - orders[None, :])
+        total = orders[:, None] + orders[None, :]
+        gram = np.empty((len(base), 2 * h + 1, 2 * h + 1))
+        gram[:, :h, :h] = (wcos[:, diff] + wcos[:, total]) / 2
+        gram[:, h:-1, h:-1] = (wcos[:, diff] - wcos[:, total]) / 2
+        gram[:, :h, h:-1] = (wsin[:, total] - sign * wsin[:, diff]) / 2
+        gram[:, h:-1, :h] = gram[:, :h, h:-1].transpose(0, 2, 1)
+        gram[:, :h, -1] = gram[:, -1, :h] = wcos[:, 1:h + 1]
+        gram[:, h:-1, -1] = gram[:, -1, h:-1] = wsin[:, 1:h + 1]
+        gram[:, -1, -1] = wcos[:, 0]
+        
+        # Harmonics at or above Nyquist drop out of the fit
+        self._valid = np.concatenate([freqs < self.rate / 2] * 2 + [np.ones((1, len(base)), bool)]).T
+        gram *= self._valid[:, :, None] & self._valid[:, None, :]
+        self._inverse = np.linalg.pinv(gram, rcond=1e-10)
+    
+    def _estimate(self, signal):
+        if self._phasors is None or len(signal) != self.num_samples:
+            return 0, 0.0
+        
+        windowed = self._windowed
+        np.multiply(signal, self._window, out=windowed[:self.num_samples])
+        spectrum = self._dft(self._phasors, windowed).reshape(self.harmonics, -1)
+        
+        # Projections onto the fit basis, then the fitted energy per candidate
+        projections = np.empty((self._valid.shape[1], len(self.offsets)))
+        projections[:self.harmonics] = spectrum.real
+        projections[self.harmonics:-1] = -spectrum.imag
+        projections[-1] = windowed.sum()
+        projections = projections.T * self._valid
+        energy = np.einsum('ki,kij,kj->k', projections, self._inverse, projections)
+        
+        # A maximum on the edge of the bank means the note is out of range
+        peak = int(energy.argmax())
+        if peak == 0 or peak == len(energy) - 1:
+            return 0, 0.0
+        
+        # Fraction of the frame's (windowed) energy the fit explains
+        frame_energy = np.dot(windowed[:self.num_samples], signal)
+        confidence = min(energy[peak] / frame_energy, 1.0) if frame_energy > 0 else 0.0
+        
+        offset = parabolic_peak(np.log(energy[peak - 1:peak + 2] + 1e-30), 1) - 1
+        cents = self.offsets[peak] + offset * self.step_cents
+        return self.target * 2 ** (cents / 1200), float(confidence)
+
+
+DETECTORS = {
+    detector.name: detector
+    for detector in (AutocorrelationDetector, YinDetector, McLeodDetector)
+}
+
+
+def create_detector(name=PITCH_DETECTOR, rate=SAMPLING_RATE, num_samples=NUM_SAMPLES,
+                    dtype=DSP_DTYPE):
+    """
+    Create a pitch detector by name
+    
+    Args:
+        name: "autocorrelation", "yin" or "mpm"
+        rate: Sampling rate in Hz
+        num_samples: Frame length in samples
+        dtype: Floating point type of the DSP pipeline
+    
+    Returns:
+        PitchDetector instance
+    """
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown pitch detector: {name}")
+    return DETECTORS[name](rate, num_samples, dtype)
@@ -3,69 +3,202 @@ Application state module
 Manages the current state of the tuner application
 """
 
+import itertools
+import queue
+import threading
+from collections import namedtuple
+
+
+# One immutable, self-consistent view of the application state
+StateSnapshot = namedtuple(
+    "StateSnapshot",
+    [
+        "generation",             # Bumped on every change
+        "instrument",             # "6" or "8"
+        "selected_tuning_index",
+        "current_string_index",
+        "tuned_strings",          # Tuple of note names that have been tuned
+        "current_screen",         # select_guitar, tuning_menu, tuner
+        "display_version",        # Bumped when the LCD needs a redraw
+        "last_note",              # Last detected values (for display)
+        "last_cents",
+        "last_cents_raw",
+    ]
+)
+
+INITIAL_STATE = StateSnapshot(
+    generation=0,
+    instrument=None,
+    selected_tuning_index=0,
+    current_string_index=0,
+    tuned_strings=(),
+    current_screen="select_guitar",
+    display_version=0,
+    last_note="---",
+    last_cents="---",
+    last_cents_raw=0,
+)
+
+# Fields cleared by reset_tuning_state
+TUNING_RESET = dict(
+    current_string_index=0,
+    tuned_strings=(),
+    last_note="---",
+    last_cents="---",
+    last_cents_raw=0,
+)
+
 
 class AppState:
-    """Centralized application state manager"""
+    """
+    Centralized application state manager
+    
+    The state is published as immutable StateSnapshot objects. Readers
+    (web threads, LCD, LED) take `snapshot` once and get a consistent view
+    with no lock: publishing is a single reference assignment.
+    
+    Writers (the UI loop and Flask request threads) submit commands to a
+    queue. The writer holding the write lock applies the commands queued
+    when it took the lock, in order, each producing a new snapshot copied
+    from the last one. A writer whose command was already applied by the
+    previous holder returns without doing anything, and no writer applies
+    more than one batch, so a burst of web requests cannot keep the UI
+    loop busy. Every change bumps `generation`, so readers can tell
+    whether anything changed with a single integer compare.
+    """
     
     def __init__(self):
-        # Instrument configuration
-        self.instrument = None  # "6" or "8"
-        self.selected_tuning_index = 0
-        
-        # Tuning state
-        self.current_string_index = 0
-        self.tuned_strings = {}  # Dict of strings that have been tuned
-        
-        # UI state
-        self.current_screen = "select_guitar"  # select_guitar, tuning_menu, tuner
-        self.update_lcd = True  # Flag to trigger LCD refresh
+        self._snapshot = INITIAL_STATE
+        self._commands = queue.SimpleQueue()
+        self._write_lock = threading.Lock()
+        self._generations = itertools.count(1)
+        self._listeners = []
+    
+    @property
+    def snapshot(self):
+        """Current StateSnapshot"""
+        return self._snapshot
+    
+    def __getattr__(self, name):
+        """Read single fields (state.current_screen, ...) from the snapshot"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._snapshot, name)
+    
+    def add_listener(self, callback):
+        """
+        Call callback() after every state change
         
-        # Last detected values (for display)
-        self.last_note = "---"
-        self.last_cents = "---"
-        self.last_cents_raw = 0
-    
-    def reset_tuning_state(self):
-        """Reset tuning-related state"""
-        self.current_string_index = 0
-        self.tuned_strings = {}
-        self.last_note = "---"
-        self.last_cents = "---"
-        self.last_cents_raw = 0
-    
-    def set_instrument(self, instrument):
+        It runs on whichever thread applied the change, so it must be
+        quick and thread-safe (e.g. setting an Event).
+        """
+        self._listeners.append(callback)
+    
+    # ============================================================
+    # COMMAND QUEUE
+    # ============================================================
+    def _submit(self, command, *args):
+        """Queue a command and return once it has been applied"""
+        entry = [command, args, False]
+        self._commands.put(entry)
+        with self._write_lock:
+            if not entry[2]:
+                # Everything queued up to and including our command
+                self._apply_pending(self._commands.qsize())
+    
+    def _apply_pending(self, count):
+        """Apply the next `count` queued commands in order (write lock held)"""
+        for _ in range(count):
+            try:
+                entry = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            command, args, _ = entry
+            entry[2] = True
+            
+            snapshot = self._snapshot
+            changes = command(snapshot, *args)
+            if changes and any(getattr(snapshot, k) != v for k, v in changes.items()):
+                self._snapshot = snapshot._replace(generation=next(self._generations), **changes)
+                for callback in self._listeners:
+                    callback()
+    
+    # ============================================================
+    # COMMANDS
+    # ============================================================
+    # Each command maps the current snapshot to a dict of changed fields
+    
+    @staticmethod
+    def _redraw(snapshot, **changes):
+        """Changes plus a display redraw"""
+        return dict(changes, display_version=snapshot.display_version + 1)
+    
+    def reset_tuning_state(self, screen=None):
+        """Reset tuning-related state (and optionally change screen)"""
+        def command(s):
+            changes = dict(TUNING_RESET)
+            if screen is not None:
+                changes = self._redraw(s, current_screen=screen, **changes)
+            return changes
+        self._submit(command)
+    
+    def set_instrument(self, instrument, screen=None):
         """Set the instrument type"""
-        self.instrument = instrument
-        self.selected_tuning_index = 0
-        self.reset_tuning_state()
+        def command(s):
+            changes = dict(TUNING_RESET, instrument=instrument, selected_tuning_index=0)
+            if screen is not None:
+                changes = self._redraw(s, current_screen=screen, **changes)
+            return changes
+        self._submit(command)
+    
+    def clear_instrument(self, screen=None):
+        """Go back to having no instrument selected"""
+        self.set_instrument(None, screen)
+    
+    def select_tuning(self, index, screen=None):
+        """Select a tuning by its index in the instrument's list"""
+        def command(s):
+            changes = dict(TUNING_RESET, selected_tuning_index=index)
+            if screen is not None:
+                changes = self._redraw(s, current_screen=screen, **changes)
+            return changes
+        self._submit(command)
     
     def change_screen(self, screen_name):
         """Change the current screen"""
-        self.current_screen = screen_name
-        self.update_lcd = True
+        self._submit(lambda s: self._redraw(s, current_screen=screen_name))
     
     def navigate_tuning(self, direction, max_tunings):
         """Navigate through tuning options"""
-        self.selected_tuning_index = (self.selected_tuning_index + direction) % max_tunings
-        self.update_lcd = True
+        self._submit(lambda s: self._redraw(
+            s, selected_tuning_index=(s.selected_tuning_index + direction) % max_tunings))
     
     def navigate_string(self, direction, max_strings):
         """Navigate through strings"""
-        self.current_string_index = (self.current_string_index + direction) % max_strings
-        self.update_lcd = True
+        self._submit(lambda s: self._redraw(
+            s, current_string_index=(s.current_string_index + direction) % max_strings))
     
     def set_string_index(self, index):
         """Set the current string index"""
-        if index != self.current_string_index:
-            self.current_string_index = index
-            self.update_lcd = True
+        def command(s):
+            if index != s.current_string_index:
+                return self._redraw(s, current_string_index=index)
+        self._submit(command)
     
     def mark_string_tuned(self, note_name):
         """Mark a string as tuned"""
-        self.tuned_strings[note_name] = True
+        def command(s):
+            if note_name not in s.tuned_strings:
+                return dict(tuned_strings=s.tuned_strings + (note_name,))
+        self._submit(command)
     
     def update_detection(self, note, cents_value):
         """Update detected note and cents"""
-        self.last_note = note
-        self.last_cents = f"{cents_value:+.1f}" if cents_value is not None else "---"
-        self.last_cents_raw = cents_value if cents_value is not None else 0
+        cents = f"{cents_value:+.1f}" if cents_value is not None else "---"
+        if note == self._snapshot.last_note and cents == self._snapshot.last_cents:
+            return
+        self._submit(lambda s: dict(
+            last_note=note,
+            last_cents=cents,
+            last_cents_raw=cents_value if cents_value is not None else 0
+        ))
@@ -16,8 +16,10 @@ def test_imports():
     tests = [
         ("config", "Configuration"),
         ("hardware", "Hardware Controller"),
+        ("pitch", "Pitch Detectors"),
         ("audio", "Audio Processor"),
         ("tuning", "Tuning Manager"),
+        ("worker", "DSP Worker"),
         ("state", "Application State"),
         ("web_interface", "Web Interface"),
         ("main", "Main Application"),
@@ -92,6 +94,1357 @@ def test_dependencies():
     print()
 
 
+def test_engine_equivalence():
+    """Test that the direct and FFT autocorrelation engines return the same lags"""
+    
+    print("\nTesting autocorrelation engines...")
+    print("-" * 60)
+    
+    try:
+        import numpy as np
+        from pitch import FFTAutocorrelator, direct_correlate
+        from config import NUM_SAMPLES, SAMPLING_RATE
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    fft = FFTAutocorrelator(NUM_SAMPLES)
+    t = np.arange(NUM_SAMPLES) / SAMPLING_RATE
+    rng = np.random.default_rng(0)
+    
+    # Every lag of the frame, then the lag window of a 35-450 Hz band
+    windows = {
+        "full": (0, None),
+        "tuning band": (int(SAMPLING_RATE / 450), int(np.ceil(SAMPLING_RATE / 35))),
+    }
+    tones = np.geomspace(40, 400, 60)
+    worst = dict.fromkeys(windows, 0.0)
+    
+    for freq in tones:
+        signal = (6000 * np.sin(2 * np.pi * freq * t)
+                  + 3000 * np.sin(4 * np.pi * freq * t + 1)
+                  + 200 * rng.standard_normal(NUM_SAMPLES)) / 32768.0
+        signal -= signal.mean()
+        energy = np.dot(signal, signal)
+        
+        for label, lags in windows.items():
+            # Largest difference relative to the lag 0 value
+            direct = direct_correlate(signal, *lags)
+            error = np.abs(fft.correlate(signal, *lags) - direct).max() / energy
+            worst[label] = max(worst[label], error)
+    
+    ok = max(worst.values()) < 1e-9
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {len(tones)} tones, largest difference of the lag 0 value: "
+          + ", ".join(f"{label} {error:.1e}" for label, error in worst.items()))
+    print("-" * 60)
+    return ok
+
+
+def test_allocations():
+    """Test that the in-place DSP hot path allocates nothing per frame"""
+    
+    print("\nTesting per-frame allocations...")
+    print("-" * 60)
+    
+    try:
+        import tracemalloc
+        import numpy as np
+        from pitch import AutocorrelationDetector, FFT_SUPPORTS_OUT
+        from config import NUM_SAMPLES, SAMPLING_RATE
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    if not FFT_SUPPORTS_OUT:
+        print("⚠ Skipped - NumPy 2.0+ is needed for in-place FFTs")
+        return True
+    
+    t = np.arange(NUM_SAMPLES) / SAMPLING_RATE
+    samples = (8000 * np.sin(2 * np.pi * 110 * t)).astype(np.int16)
+    detector = AutocorrelationDetector(engine="fft")
+    
+    # Warm up, then measure a run of frames
+    for _ in range(5):
+        detector.detect_pcm(samples)
+    
+    frames = 50
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for _ in range(frames):
+        detector.detect_pcm(samples)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    # Anything near one frame of float64 means an array was allocated
+    limit = NUM_SAMPLES
+    growth = current - baseline
+    transient = peak - baseline
+    ok = growth < limit and transient < limit
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {frames} frames: {growth} B retained, {transient} B peak (limit {limit} B)")
+    print("-" * 60)
+    return ok
+
+
+def test_float32_accuracy():
+    """Test that the float32 DSP pipeline matches float64 on every string"""
+    
+    print("\nTesting float32 vs float64 accuracy...")
+    print("-" * 60)
+    
+    try:
+        import numpy as np
+        from pitch import DETECTORS
+        from config import NUM_SAMPLES, SAMPLING_RATE, TUNING_FREQUENCIES
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    # Every distinct string frequency across all tunings
+    freqs = sorted({f for tuning in TUNING_FREQUENCIES.values() for f in tuning.values()})
+    t = np.arange(NUM_SAMPLES) / SAMPLING_RATE
+    rng = np.random.default_rng(0)
+    
+    tolerance = 0.5  # cents
+    ok = True
+    
+    for name, detector_class in DETECTORS.items():
+        detector64 = detector_class(dtype="float64")
+        detector32 = detector_class(dtype="float32")
+        worst = 0.0
+        
+        for freq in freqs:
+            # Fundamental + second harmonic + a little noise, as int16 PCM
+            signal = (6000 * np.sin(2 * np.pi * freq * t)
+                      + 5000 * np.sin(4 * np.pi * freq * t + 1)
+                      + 200 * rng.standard_normal(NUM_SAMPLES))
+            samples = signal.astype(np.int16)
+            
+            f64, _ = detector64.detect_pcm(samples)
+            f32, _ = detector32.detect_pcm(samples)
+            if f64 == 0 or f32 == 0:
+                worst = float("inf") if f64 != f32 else worst
+                continue
+            worst = max(worst, abs(1200 * np.log2(f32 / f64)))
+        
+        passed = worst <= tolerance
+        ok = ok and passed
+        mark = "✓" if passed else "✗"
+        print(f"{mark} {name:25s} worst {worst:.4f} cents over {len(freqs)} strings")
+    
+    print("-" * 60)
+    return ok
+
+
+def test_decimation_accuracy():
+    """Test that every detector keeps every string in tune with decimation on"""
+    
+    print("\nTesting decimated pipeline accuracy...")
+    print("-" * 60)
+    
+    try:
+        import numpy as np
+        from pitch import DETECTORS, Decimator
+        from config import NUM_SAMPLES, SAMPLING_RATE, TUNING_FREQUENCIES
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    t = np.arange(NUM_SAMPLES) / SAMPLING_RATE
+    tolerance = 2.0  # cents
+    ok = True
+    
+    for name, detector_class in DETECTORS.items():
+        rng = np.random.default_rng(0)
+        pipelines = {}
+        worst = 0.0
+        strings = 0
+        
+        for tuning in TUNING_FREQUENCIES.values():
+            # Decimation follows the highest string, as in the worker
+            factor = Decimator.factor_for(max(tuning.values()))
+            if factor not in pipelines:
+                decimator = Decimator(factor)
+                pipelines[factor] = (decimator, detector_class(
+                    rate=SAMPLING_RATE / factor,
+                    num_samples=decimator.output_length(NUM_SAMPLES)
+                ))
+            decimator, detector = pipelines[factor]
+            
+            for target in tuning.values():
+                strings += 1
+                for detune in (-20, 0, 13):
+                    freq = target * 2 ** (detune / 1200)
+                    signal = (6000 * np.sin(2 * np.pi * freq * t + rng.uniform(0, 2 * np.pi))
+                              + 5000 * np.sin(4 * np.pi * freq * t + 1)
+                              + 200 * rng.standard_normal(NUM_SAMPLES))
+                    
+                    # Same steps as AudioProcessor._analyze
+                    frame = signal.astype(np.int16) / 32768.0
+                    frame -= frame.mean()
+                    found, _ = detector.estimate(detector.prepare(decimator.process(frame)))
+                    if found:
+                        found = decimator.refine(frame, found)
+                    error = abs(1200 * np.log2(found / freq)) if found else float("inf")
+                    worst = max(worst, error)
+        
+        passed = worst <= tolerance
+        ok = ok and passed
+        mark = "✓" if passed else "✗"
+        print(f"{mark} {name:25s} worst {worst:.3f} cents over {strings} strings")
+    
+    print("-" * 60)
+    return ok
+
+
+def test_targeted_accuracy():
+    """Test the targeted Goertzel bank on every string, with and without decimation"""
+    
+    print("\nTesting targeted detection accuracy...")
+    print("-" * 60)
+    
+    try:
+        import time
+        import numpy as np
+        from pitch import GoertzelDetector, Decimator
+        from config import NUM_SAMPLES, SAMPLING_RATE, TUNING_FREQUENCIES
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    t = np.arange(NUM_SAMPLES) / SAMPLING_RATE
+    rng = np.random.default_rng(0)
+    tolerance = 1.0  # cents
+    ok = True
+    
+    for decimate in (False, True):
+        detectors = {}
+        worst = 0.0
+        set_target = []
+        
+        for tuning in TUNING_FREQUENCIES.values():
+            # Decimation follows the highest string, as in the worker
+            factor = Decimator.factor_for(max(tuning.values())) if decimate else 1
+            if factor not in detectors:
+                decimator = Decimator(factor) if factor > 1 else None
+                length = decimator.output_length(NUM_SAMPLES) if decimator else NUM_SAMPLES
+                detectors[factor] = (decimator, GoertzelDetector(SAMPLING_RATE / factor, length))
+            decimator, detector = detectors[factor]
+            
+            for target in tuning.values():
+                start = time.perf_counter()
+                detector.set_target(target)
+                set_target.append(time.perf_counter() - start)
+                
+                for detune in (-40, -15, 0, 7, 25):
+                    freq = target * 2 ** (detune / 1200)
+                    signal = (6000 * np.sin(2 * np.pi * freq * t + rng.uniform(0, 2 * np.pi))
+                              + 5000 * np.sin(4 * np.pi * freq * t + 1)
+                              + 200 * rng.standard_normal(NUM_SAMPLES))
+                    frame = signal.astype(np.int16) / 32768.0
+                    if decimator is not None:
+                        frame = decimator.process(frame)
+                    found, _ = detector.estimate(detector.prepare(frame))
+                    error = abs(1200 * np.log2(found / freq)) if found else float("inf")
+                    worst = max(worst, error)
+            detector.set_target(None)
+        
+        passed = worst <= tolerance
+        ok = ok and passed
+        mark = "✓" if passed else "✗"
+        label = "decimated" if decimate else "full rate"
+        print(f"{mark} {label:10s} worst {worst:.3f} cents over {len(set_target)} strings, "
+              f"set_target {1000 * max(set_target):.1f} ms max")
+    
+    print("-" * 60)
+    return ok
+
+
+def test_ring_buffer():
+    """Test callback capture: ring buffer wrap-around and one analysis per hop"""
+    
+    print("\nTesting callback ring buffer...")
+    print("-" * 60)
+    
+    try:
+        import threading
+        import numpy as np
+        from audio import AudioProcessor, RingBuffer
+        from config import HOP_SIZE
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    # Blocks of uneven size (one longer than the buffer) wrap around the
+    # end; the newest window always matches the tail of everything written
+    rng = np.random.default_rng(0)
+    ring = RingBuffer(1000)
+    reference = np.zeros(0, dtype=np.int16)
+    out = np.empty(700, dtype=np.int16)
+    wrapped = True
+    for size in (300, 450, 999, 1, 1500, 640, 333):
+        block = rng.integers(-32768, 32767, size, dtype=np.int16)
+        ring.write(block)
+        reference = np.concatenate([reference, block])
+        end = ring.read_latest(out)
+        tail = reference[-len(out):]
+        wrapped = (wrapped and end == len(reference)
+                   and np.array_equal(out[-len(tail):], tail))
+    
+    # Callbacks deliver half a hop at a time; the detection side analyzes
+    # the newest window once per full hop and returns the last reading
+    # in between
+    window, hop = 4 * HOP_SIZE, HOP_SIZE
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.ring = RingBuffer(2 * window)
+    processor._frame = np.empty(window, dtype=np.int16)
+    processor.window, processor.hop = window, hop
+    processor._analyzed_at = processor._last_freq = 0
+    processor._hop_ready = threading.Event()
+    processor._written_at = processor.captured_at = 0.0
+    processor.overruns = processor.short_reads = processor.samples_lost = 0
+    
+    analyzed = []
+    
+    def analyze(frame, advance):
+        analyzed.append((processor.ring.written, advance, frame.copy()))
+        return len(analyzed)
+    
+    processor._analyze = analyze
+    stream = rng.integers(-32768, 32767, 16 * hop, dtype=np.int16)
+    readings = []
+    for start in range(0, len(stream), hop // 2):
+        block = stream[start:start + hop // 2]
+        processor._on_audio(block.tobytes(), len(block), None, 0)
+        readings.append(processor._detect_overlapped(block=False))
+    
+    ends = [end for end, _, _ in analyzed]
+    hops_ok = (
+        ends == list(range(window, len(stream) + 1, hop))
+        and all(advance == hop for _, advance, _ in analyzed[1:])
+        and all(np.array_equal(frame, stream[end - window:end]) for end, _, frame in analyzed)
+        and readings[-1] == len(analyzed) and processor.samples_lost == 0
+    )
+    
+    # A detection pass that falls more than a window behind analyzes the
+    # newest window once and counts the skipped samples as lost
+    burst = rng.integers(-32768, 32767, window + 3 * hop, dtype=np.int16)
+    processor._on_audio(burst.tobytes(), len(burst), None, 0)
+    processor._detect_overlapped(block=False)
+    late_ok = (
+        analyzed[-1][1] == len(burst)
+        and np.array_equal(analyzed[-1][2], burst[-window:])
+        and processor.samples_lost == len(burst) - window
+    )
+    
+    ok = wrapped and hops_ok and late_ok
+    mark = "✓" if ok else "✗"
+    print(f"{mark} wrap-around reads {'match' if wrapped else 'differ'}; "
+          f"{len(ends)} analyses over {len(stream) // hop} hops of half-hop callbacks, "
+          f"{processor.samples_lost} samples lost after a late pass")
+    print("-" * 60)
+    return ok
+
+
+def test_pitch_worker():
+    """Test the worker's single-slot reading handoff and stale readings"""
+    
+    print("\nTesting pitch worker...")
+    print("-" * 60)
+    
+    try:
+        import threading
+        import time
+        from worker import PitchWorker, EMPTY_READING
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    class ToneSource:
+        # Stands in for AudioProcessor: the n-th frame reads 100 + n Hz,
+        # captured at time n
+        def __init__(self):
+            self.frames = 0
+            self.suspended = 0
+            self.last_confidence = 0.0
+            self.captured_at = 0.0
+            self._lock = threading.Lock()
+        
+        def detect_pitch(self, block=False):
+            with self._lock:
+                self.frames += 1
+                self.captured_at = float(self.frames)
+                self.last_confidence = 0.9
+                return 100.0 + self.frames
+        
+        def suspend(self):
+            self.suspended += 1
+    
+    target = ("E Standard", 1, False)
+    
+    # Inline: every step publishes a reading matched against the target;
+    # read() drops readings for another target or older than max_age
+    audio = ToneSource()
+    worker = PitchWorker(audio)
+    worker.set_target(*target)
+    worker.step()
+    reading = worker.latest
+    age = time.monotonic() - reading.timestamp
+    inline_ok = (
+        reading.frequency == 101.0 and reading.note == "A2" and reading.cents < 0
+        and worker.read(target, max_age=age + 60) is reading
+        and worker.read(("E Standard", 2, False), max_age=age + 60) is EMPTY_READING
+        and worker.read(target, max_age=age - 1) is EMPTY_READING
+    )
+    worker.clear_target()
+    inline_ok = inline_ok and not worker.step() and audio.suspended == 2
+    
+    # Thread: a reader polling the slot while the worker publishes only
+    # ever sees whole readings (frequency and timestamp from one frame),
+    # never older than the one it saw before
+    audio = ToneSource()
+    worker = PitchWorker(audio)
+    worker.set_target(*target)
+    worker.start()
+    seen = []
+    deadline = time.monotonic() + 0.2
+    while time.monotonic() < deadline:
+        reading = worker.latest
+        if reading.target is not None:
+            seen.append(reading)
+    worker.stop()
+    published = audio.frames
+    time.sleep(0.05)
+    stopped = worker._thread is None and audio.frames == published
+    
+    stamps = [reading.timestamp for reading in seen]
+    thread_ok = (
+        stopped and len(seen) > 0 and published > 1
+        and all(reading.frequency == 100.0 + reading.timestamp for reading in seen)
+        and stamps == sorted(stamps) and worker.latest.timestamp == published
+    )
+    
+    ok = inline_ok and thread_ok
+    mark = "✓" if ok else "✗"
+    print(f"{mark} inline reading {'ok' if inline_ok else 'wrong'}; thread published "
+          f"{published} readings, {len(seen)} polls saw only whole readings in order")
+    print("-" * 60)
+    return ok
+
+
+def test_process_worker():
+    """Test the shared results ring and the DSP process lifecycle"""
+    
+    print("\nTesting process worker...")
+    print("-" * 60)
+    
+    try:
+        import time
+        import numpy as np
+        from multiprocessing import shared_memory
+        from worker import (
+            SharedRing, ProcessPitchWorker, EMPTY_READING,
+            CTRL_VERSION, CTRL_TUNING, CTRL_AUTO
+        )
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    # Records written by one handle come back whole through another
+    # attached by name; the oldest slots are overwritten, and a slot
+    # being rewritten is reported rather than copied half-done
+    ring = SharedRing(4, 3)
+    reader = SharedRing(4, 3, name=ring.name)
+    out = np.empty(3)
+    empty = not reader.read_latest(out)
+    for n in range(10):
+        ring.write((n, 2.0 * n, -n))
+    latest = reader.read_latest(out) and list(out) == [9.0, 18.0, -9.0]
+    reader._seqs[9 % 4] = -1
+    torn = not reader.read_latest(out)
+    ring_ok = empty and latest and torn and reader.count == 10
+    reader.close()
+    ring.close()
+    ring.shm.unlink()
+    
+    # Targets go down through the control block (the version moves only
+    # on a change), readings come back decoded from result records
+    worker = ProcessPitchWorker()
+    control = worker._control
+    worker.set_target("Drop D", 0, False)
+    worker.set_target("Drop D", 0, False)
+    published = int(control[CTRL_VERSION]) == 1 and list(control[CTRL_TUNING:CTRL_AUTO + 1]) == [1, 0, 0]
+    worker.clear_target()
+    published = published and int(control[CTRL_VERSION]) == 2 and control[CTRL_TUNING] == -1
+    
+    record = np.array([73.0, 0.8, 0, 73.42, -9.9, 12.5, 1, 0, 0])
+    no_reading = worker.latest is EMPTY_READING
+    worker._results.write(record)
+    reading = worker.latest
+    decoded = (
+        no_reading and reading.target == ("Drop D", 0, False)
+        and reading.note == "D2" and reading.frequency == 73.0 and reading.cents == -9.9
+    )
+    
+    # The DSP process stops on request and the shared memory is released
+    names = [worker._results.name, worker._control_shm.name]
+    try:
+        import audio  # noqa: F401 (the DSP process opens the stream)
+        worker.start()
+        time.sleep(0.5)
+        running = worker._process.is_alive()
+        process = worker._process
+        worker.stop()
+        lifecycle = running and process.exitcode == 0
+    except ImportError as e:
+        print(f"⚠ Skipped DSP process start - {e}")
+        worker.stop()
+        lifecycle = True
+    
+    released = 0
+    for name in names:
+        try:
+            shared_memory.SharedMemory(name=name).close()
+        except FileNotFoundError:
+            released += 1
+    
+    ok = ring_ok and published and decoded and lifecycle and released == len(names)
+    mark = "✓" if ok else "✗"
+    print(f"{mark} ring round-trip {'ok' if ring_ok else 'wrong'}, target "
+          f"{'published' if published else 'not published'}, reading "
+          f"{'decoded' if decoded else 'wrong'}, process "
+          f"{'stopped cleanly' if lifecycle else 'did not stop'}, "
+          f"{released}/{len(names)} shared blocks released")
+    print("-" * 60)
+    return ok
+
+
+def test_adaptive_window():
+    """Test the per-string analysis window and hop selection"""
+    
+    print("\nTesting adaptive analysis window...")
+    print("-" * 60)
+    
+    try:
+        import numpy as np
+        from audio import AudioProcessor
+        from config import (
+            NUM_SAMPLES, HOP_SIZE, SAMPLING_RATE, ANALYSIS_WINDOWS,
+            WINDOW_PERIODS, TUNING_FREQUENCIES
+        )
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.window, processor.hop, processor._factor = NUM_SAMPLES, HOP_SIZE, 1
+    processor._pipelines = {}
+    processor._target_freq = None
+    processor._search_range = None
+    processor._activate()
+    processor.set_search_range(30, 400)
+    
+    # Each string gets the shortest window holding WINDOW_PERIODS periods
+    # (the longest one below that), the hop keeps the overlap, and the
+    # search band follows the detector swap
+    windows = sorted(ANALYSIS_WINDOWS)
+    freqs = sorted({f for tuning in TUNING_FREQUENCIES.values() for f in tuning.values()})
+    ok = True
+    chosen = {}
+    for freq in freqs:
+        processor.set_window(freq)
+        needed = WINDOW_PERIODS * SAMPLING_RATE / freq
+        index = windows.index(processor.window)
+        shortest = (processor.window >= needed or processor.window == windows[-1]) and (
+            index == 0 or windows[index - 1] < needed)
+        ok = ok and (
+            shortest
+            and processor.hop * NUM_SAMPLES == processor.window * HOP_SIZE
+            and processor.detector.num_samples == processor.window
+            and processor.detector._lag_max is not None
+        )
+        chosen.setdefault(processor.window, []).append(freq)
+    
+    # Pipelines are built once per window and reused
+    processor.set_window(freqs[0])
+    lowest = processor.detector
+    processor.set_window(freqs[-1])
+    processor.set_window(freqs[0])
+    reused = processor.detector is lowest and len(processor._pipelines) == len(chosen)
+    
+    # The lowest string is still found in its window
+    processor.set_window(None)
+    default = processor.window == NUM_SAMPLES
+    processor.set_window(freqs[0])
+    t = np.arange(processor.window) / SAMPLING_RATE
+    tone = (6000 * np.sin(2 * np.pi * freqs[0] * t)
+            + 5000 * np.sin(4 * np.pi * freqs[0] * t + 1)).astype(np.int16)
+    found, _ = processor.detector.detect_pcm(tone)
+    accurate = found and abs(1200 * np.log2(found / freqs[0])) < 5
+    
+    ok = ok and reused and default and accurate
+    mark = "✓" if ok else "✗"
+    spread = ", ".join(f"{window}: {min(f)}-{max(f)} Hz" for window, f in sorted(chosen.items()))
+    print(f"{mark} {spread}; {freqs[0]} Hz read as {found:.2f} Hz")
+    print("-" * 60)
+    return ok
+
+
+def test_tuning_tables():
+    """Test nearest-string lookups against a linear search, at the boundaries"""
+    
+    print("\nTesting tuning tables...")
+    print("-" * 60)
+    
+    import math
+    from tuning import TUNING_TABLES, TuningManager
+    
+    def linear(order, freq):
+        # Reference: the string with the smallest absolute cents offset
+        offsets = [1200 * math.log2(freq / target) for _, target in order]
+        idx = min(range(len(order)), key=lambda i: abs(offsets[i]))
+        return idx, offsets[idx]
+    
+    checked = 0
+    failures = []
+    for name, table in TUNING_TABLES.items():
+        # Just either side of every midpoint, on each string, and beyond
+        # both ends of the tuning
+        probes = [table.frequencies[0] / 4, table.frequencies[-1] * 4]
+        probes += [float(freq) for freq in table.frequencies]
+        for boundary in table.boundaries:
+            probes += [2 ** (boundary - 1e-9), 2 ** (boundary + 1e-9)]
+        
+        for freq in probes:
+            idx, cents = table.nearest(freq)
+            expected_idx, expected_cents = linear(table.order, freq)
+            checked += 1
+            if idx != expected_idx or abs(cents - expected_cents) > 1e-6:
+                failures.append((name, freq, idx, expected_idx))
+        
+        # The manager returns the matched string's note and frequency
+        note, target = table.order[-1]
+        if TuningManager.find_closest_string(target * 1.01, name)[:3] != (len(table.order) - 1, note, target):
+            failures.append((name, target, "find_closest_string"))
+    
+    invalid = [TUNING_TABLES["E Standard"].nearest(freq) for freq in (0, -5, None)]
+    ok = not failures and invalid == [(None, None)] * 3
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {checked} lookups over {len(TUNING_TABLES)} tunings, "
+          f"{len(failures)} mismatches{': ' + str(failures[:3]) if failures else ''}")
+    print("-" * 60)
+    return ok
+
+
+def test_chromatic_scale():
+    """Test chromatic note names, cents offsets and LCD lines"""
+    
+    print("\nTesting chromatic scale...")
+    print("-" * 60)
+    
+    from tuning import CHROMATIC_SCALE
+    from config import CHROMATIC_A4, LCD_COLS
+    
+    # Known notes, and the note a few cents either side reads back
+    known = {"A4": CHROMATIC_A4, "E2": 82.4069, "C4": 261.6256, "F#1": 46.2493, "E4": 329.6276}
+    failures = []
+    for name, freq in known.items():
+        for cents in (-49, -10, 0, 10, 49):
+            _, note, note_freq, offset = CHROMATIC_SCALE.lookup(freq * 2 ** (cents / 1200))
+            if note != name or abs(note_freq - freq) > 0.01 or abs(offset - cents) > 0.01:
+                failures.append((name, cents, note, offset))
+    
+    # Half a semitone up rounds to the next note; outside the table and
+    # invalid input read as no note
+    above = CHROMATIC_SCALE.lookup(CHROMATIC_A4 * 2 ** (51 / 1200))[1]
+    outside = [CHROMATIC_SCALE.lookup(freq) for freq in (10, 5000, 0, -440)]
+    
+    # LCD lines fit the display and name the note; unknown notes get dashes
+    lines = [CHROMATIC_SCALE.lcd_line(note) for note in CHROMATIC_SCALE.notes]
+    lcd_ok = (
+        all(len(line) == LCD_COLS and line.startswith(f"Note:{note} ")
+            for note, line in zip(CHROMATIC_SCALE.notes, lines))
+        and CHROMATIC_SCALE.lcd_line("A4").strip() == "Note:A4 440.0Hz"
+        and CHROMATIC_SCALE.lcd_line(None) == "Note:---".ljust(LCD_COLS)
+        and CHROMATIC_SCALE.lcd_line("H2") == "Note:---".ljust(LCD_COLS)
+    )
+    
+    ok = not failures and above == "A#4" and outside == [(None,) * 4] * 4 and lcd_ok
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {len(CHROMATIC_SCALE.notes)} notes {CHROMATIC_SCALE.notes[0]}-"
+          f"{CHROMATIC_SCALE.notes[-1]}, {len(failures)} lookup mismatches, "
+          f"LCD lines {'ok' if lcd_ok else 'wrong'}")
+    print("-" * 60)
+    return ok
+
+
+def test_button_events():
+    """Test debounced button events on fake GPIO hardware"""
+    
+    print("\nTesting debounced button events...")
+    print("-" * 60)
+    
+    import threading
+    import time
+    from hardware import HardwareController, FakeGPIO, FakeLCD
+    from config import BTN_LEFT, BTN_ENTER, BUTTON_DEBOUNCE_MS
+    
+    gpio = FakeGPIO()
+    hardware = HardwareController(gpio=gpio, lcd=FakeLCD())
+    settle = 2 * BUTTON_DEBOUNCE_MS / 1000.0
+    
+    def bouncy(pin, level):
+        # Contact chatter ending on the requested level
+        for _ in range(5):
+            gpio.set_input(pin, level)
+            gpio.set_input(pin, 1 - level)
+        gpio.set_input(pin, level)
+    
+    bouncy(BTN_LEFT, 0)
+    time.sleep(settle)
+    bouncy(BTN_LEFT, 1)
+    time.sleep(settle)
+    gpio.press(BTN_ENTER)
+    
+    events = hardware.get_button_events()
+    ok = events == [BTN_LEFT, BTN_ENTER] and hardware.get_button_events() == []
+    
+    # Heavy chatter keeps at most one re-sample timer per pin, and
+    # cleanup() cancels it
+    time.sleep(settle)
+    threads = threading.active_count()
+    for _ in range(25):
+        bouncy(BTN_LEFT, 0)
+        bouncy(BTN_LEFT, 1)
+    timers = threading.active_count() - threads
+    hardware.cleanup()
+    time.sleep(settle)
+    ok = ok and timers <= 1 and threading.active_count() == threads
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} bouncy press/release + press -> {events}; "
+          f"{timers} re-sample timer(s) during 250 bounce edges")
+    print("-" * 60)
+    return ok
+
+
+def test_lcd_framebuffer():
+    """Test that the LCD framebuffer only sends changed characters"""
+    
+    print("\nTesting LCD framebuffer...")
+    print("-" * 60)
+    
+    from hardware import LcdFramebuffer, FakeLCD
+    
+    readings = [f"{c / 10:+.1f}" for c in range(-200, 200, 7)]
+    
+    # Old renderer: clear and rewrite both rows for every reading
+    naive = FakeLCD()
+    for cents in readings:
+        naive.clear()
+        naive.write_string("Str:A2 (2/6)")
+        naive.cursor_pos = (1, 0)
+        naive.write_string(f"Cents:{cents}")
+    
+    lcd = FakeLCD()
+    display = LcdFramebuffer(lcd, max_fps=0)
+    for cents in readings:
+        display.set_lines("Str:A2 (2/6)", f"Cents:{cents}")
+        display.flush()
+    
+    ok = lcd.text == naive.text and lcd.transfers < naive.transfers / 3
+    
+    # A second frame inside the refresh interval is held back
+    capped = LcdFramebuffer(FakeLCD(), max_fps=10)
+    capped.set_lines("A")
+    first = capped.flush()
+    capped.set_lines("B")
+    ok = ok and first and not capped.flush() and capped.flush(force=True)
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {len(readings)} readings: {lcd.transfers} transfers "
+          f"(full redraw {naive.transfers})")
+    print("-" * 60)
+    return ok
+
+
+def test_led_driver():
+    """Test that the LED driver only writes GPIO on color changes"""
+    
+    print("\nTesting LED driver...")
+    print("-" * 60)
+    
+    from hardware import LedDriver, FakeGPIO
+    
+    # Discrete mode: three color changes over 150 frames cost three
+    # writes of the three pins, not one set per frame
+    gpio = FakeGPIO()
+    led = LedDriver(gpio, mode="discrete")
+    for cents in [3.0] * 50 + [20.0] * 50 + [None] * 50:
+        led.set_cents(cents)
+    gpio_writes = gpio.writes
+    ok = gpio_writes == 3 * 3
+    
+    # PWM mode: duty cycles follow the offset, green -> yellow -> red
+    gpio = FakeGPIO()
+    led = LedDriver(gpio, mode="pwm")
+    shades = []
+    for cents in (0.0, 32.5, 60.0):
+        led.set_cents(cents)
+        shades.append(led.color)
+    ok = ok and shades == [(0, 100, 0), (100, 100, 0), (100, 0, 0)]
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} discrete: {gpio_writes} pin writes over 150 frames; pwm shades {shades}")
+    print("-" * 60)
+    return ok
+
+
+def test_state_snapshots():
+    """Test that concurrent writers never expose a torn AppState snapshot"""
+    
+    print("\nTesting AppState snapshots...")
+    print("-" * 60)
+    
+    import threading
+    from state import AppState
+    
+    state = AppState()
+    state.set_instrument("6", screen="tuner")
+    done = threading.Event()
+    torn = []
+    
+    updates = 5000
+    
+    def web_writer():
+        # A fixed amount of work, so the test always finishes
+        for _ in range(updates):
+            state.navigate_string(1, 6)
+    
+    def reader():
+        while not done.is_set():
+            snapshot = state.snapshot
+            # A snapshot is a whole tuple: fields always belong together
+            if snapshot.instrument != "6" or snapshot.current_screen != "tuner":
+                torn.append(snapshot)
+    
+    threads = [threading.Thread(target=web_writer) for _ in range(2)]
+    threads.append(threading.Thread(target=reader))
+    for thread in threads:
+        thread.start()
+    
+    for i in range(updates):
+        state.update_detection("E2", i % 100 / 10)
+    done.set()
+    for thread in threads:
+        thread.join()
+    
+    # Every queued command must have been applied by some writer
+    state.update_detection("A2", 1.0)
+    final = state.snapshot
+    ok = not torn and final.last_note == "A2" and final.last_cents == "+1.0"
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {updates} detections with concurrent navigation: "
+          f"{len(torn)} torn snapshots, generation {final.generation}")
+    print("-" * 60)
+    return ok
+
+
+def test_event_deltas():
+    """Test the /events stream: snapshot first, then only changed fields"""
+    
+    print("\nTesting event stream deltas...")
+    print("-" * 60)
+    
+    try:
+        import json
+        from state import AppState
+        from web_interface import WebInterface
+        from config import EVENTS_BACKLOG
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    def parse(chunk):
+        # (event name, data) for each message in a chunk of the stream
+        messages = []
+        for block in chunk.decode().strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.split("\n"))
+            messages.append((fields.get("event"), json.loads(fields["data"])))
+        return messages
+    
+    state = AppState()
+    web = WebInterface(state)
+    stream = web._stream_events()
+    
+    # A new subscriber starts from a full snapshot
+    (name, snapshot), = parse(next(stream))
+    subscribed = web.events.subscribers == 1
+    
+    # Picking a tuning sends the string list once, then the live fields
+    state.set_instrument("6", screen="tuning_menu")
+    state.select_tuning(1, screen="tuner")
+    web.publish()
+    tuning = parse(next(stream))
+    
+    # A reading only sends the fields it changed; publishing again without
+    # a state change sends nothing
+    web.publish()
+    state.update_detection("D2", -3.04)
+    web.publish()
+    reading = parse(next(stream))
+    
+    ok = (
+        subscribed and name == "snapshot"
+        and {"all_strings", "current_note", "cents"} <= set(snapshot)
+        and len(tuning) == 2 and tuning[0][1]["tuning"] == "Drop D"
+        and tuning[0][1]["all_strings"][0] == {"name": "D2", "freq": 73.42}
+        and "all_strings" not in tuning[1][1]
+        and reading == [(None, {"cents": "-3.0", "cents_raw": -3.0})]
+    )
+    
+    # A subscriber that falls out of the backlog resyncs from a snapshot
+    for i in range(EVENTS_BACKLOG + 1):
+        state.update_detection("D2", i / 10)
+        web.publish()
+    resync = parse(next(stream))
+    stream.close()
+    ok = ok and [name for name, _ in resync] == ["snapshot"] and web.events.subscribers == 0
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} snapshot of {len(snapshot)} fields, tuning change -> "
+          f"{[len(data) for _, data in tuning]} fields, reading -> {reading[0][1] if reading else None}")
+    print("-" * 60)
+    return ok
+
+
+def test_status_etag():
+    """Test /status ETags: 304 while the state is unchanged, cached body"""
+    
+    print("\nTesting /status ETag...")
+    print("-" * 60)
+    
+    try:
+        from state import AppState
+        from web_interface import WebInterface
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    state = AppState()
+    state.set_instrument("6", screen="tuner")
+    web = WebInterface(state)
+    client = web.app.test_client()
+    
+    first = client.get("/status")
+    etag = first.headers["ETag"]
+    unchanged = client.get("/status", headers={"If-None-Match": etag})
+    body = web._status_payload()[0]
+    cached = web._status_payload()[0] is body
+    
+    # A reading moves the generation: new ETag and a full body again
+    state.update_detection("E2", 2.0)
+    changed = client.get("/status", headers={"If-None-Match": etag})
+    
+    # ETags from another run (another boot id) never match
+    restarted = WebInterface(state).app.test_client().get(
+        "/status", headers={"If-None-Match": changed.headers["ETag"]})
+    
+    ok = (
+        first.status_code == 200 and first.json["instrument"] == "6"
+        and first.headers["Cache-Control"] == "no-cache"
+        and unchanged.status_code == 304 and not unchanged.data
+        and unchanged.headers["ETag"] == etag and cached
+        and changed.status_code == 200 and changed.headers["ETag"] != etag
+        and changed.json["current_note"] == "E2" and changed.json["cents"] == "+2.0"
+        and restarted.status_code == 200
+    )
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} /status {first.status_code}, same ETag {unchanged.status_code}, "
+          f"after a reading {changed.status_code}, after a restart {restarted.status_code}")
+    print("-" * 60)
+    return ok
+
+
+def test_static_assets():
+    """Test the cached page and the fingerprinted, gzipped CSS/JS assets"""
+    
+    print("\nTesting page and static assets...")
+    print("-" * 60)
+    
+    try:
+        import gzip
+        import hashlib
+        from state import AppState
+        from web_interface import WebInterface, STATIC_ASSETS, CSS_URL, JS_URL
+        from config import STATIC_MAX_AGE
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    state = AppState()
+    web = WebInterface(state)
+    client = web.app.test_client()
+    
+    # The page links the hashed URLs and is rendered once per screen
+    page = client.get("/").data.decode()
+    cached = client.get("/").data.decode() == page and len(web._pages) == 1
+    state.set_instrument("6", screen="tuning_menu")
+    client.get("/")
+    page_ok = CSS_URL in page and JS_URL in page and cached and len(web._pages) == 2
+    
+    # Assets are served long-lived, gzipped on request, with the body
+    # the URL hash was computed from
+    assets_ok = True
+    for url, asset in STATIC_ASSETS.items():
+        plain = client.get(url)
+        packed = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+        assets_ok = assets_ok and (
+            plain.status_code == 200 and plain.data == asset.body
+            and hashlib.sha256(plain.data).hexdigest()[:12] in url
+            and plain.mimetype == asset.mimetype
+            and plain.headers["Cache-Control"] == f"public, max-age={STATIC_MAX_AGE}, immutable"
+            and packed.headers.get("Content-Encoding") == "gzip"
+            and gzip.decompress(packed.data) == asset.body
+            and packed.headers["Vary"] == "Accept-Encoding"
+        )
+    missing = client.get(CSS_URL.replace(".css", ".old.css")).status_code
+    
+    ok = page_ok and assets_ok and missing == 404
+    mark = "✓" if ok else "✗"
+    print(f"{mark} page {'cached with hashed asset URLs' if page_ok else 'wrong'}, "
+          f"{len(STATIC_ASSETS)} assets {'ok' if assets_ok else 'wrong'}, unknown asset {missing}")
+    print("-" * 60)
+    return ok
+
+
+def test_pooled_server():
+    """Test the pooled web server's event stream limit on a local port"""
+    
+    print("\nTesting pooled web server...")
+    print("-" * 60)
+    
+    try:
+        import http.client
+        import time
+        from flask import request
+        from state import AppState
+        from web_interface import WebInterface
+    except ImportError as e:
+        print(f"⚠ Skipped - {e}")
+        return True
+    
+    state = AppState()
+    web = WebInterface(state)
+    
+    @web.app.route("/_environ")
+    def environ():
+        return {"multithread": request.environ["wsgi.multithread"]}
+    
+    web.start(mode="pooled", host="127.0.0.1", port=0)
+    port = web.server.server_port
+    
+    def open_stream():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("GET", "/events")
+        response = connection.getresponse()
+        if response.status == 200:
+            response.readline()  # First line of the initial snapshot
+        return connection, response
+    
+    def get(path):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response.status, body
+    
+    def close_streams(closing):
+        # A stream ends when an event fails to send to its closed socket
+        for connection, response in closing:
+            response.close()
+            connection.close()
+        left = web.events.subscribers - len(closing)
+        deadline = time.monotonic() + 5
+        while web.events.subscribers > left and time.monotonic() < deadline:
+            state.update_detection("A2", time.monotonic() % 10)
+            web.publish()
+            time.sleep(0.05)
+    
+    streams = []
+    try:
+        # Streams up to the limit are served, the next one is turned away
+        # while plain requests still get a worker
+        streams += [open_stream() for _ in range(web._max_subscribers)]
+        opened = [response.status for _, response in streams]
+        _, rejected = open_stream()
+        multithread = get("/_environ")[1] == b'{"multithread":true}\n'
+        
+        # Closing a stream frees its slot once the next event fails to send
+        close_streams([streams.pop()])
+        streams.append(open_stream())
+        reopened = streams[-1][1]
+        
+        ok = (
+            opened == [200] * web._max_subscribers
+            and rejected.status == 503
+            and reopened.status == 200
+            and multithread
+        )
+        
+        mark = "✓" if ok else "✗"
+        print(f"{mark} {len(opened)} streams {set(opened)}, next {rejected.status}, "
+              f"after one closed {reopened.status}; wsgi.multithread {multithread}")
+    finally:
+        close_streams(streams)
+        web.stop()
+    
+    print("-" * 60)
+    return ok
+
+
+def test_metrics():
+    """Test the latency histograms and that disabled probes record nothing"""
+    
+    print("\nTesting metrics...")
+    print("-" * 60)
+    
+    from metrics import Metrics
+    
+    off = Metrics(enabled=False)
+    off.stop("conversion", off.start())
+    off.frame()
+    
+    on = Metrics(enabled=True)
+    for value in (0.0002, 0.003, 0.003, 2.0):
+        on.stages["pitch_estimate"].observe(value)
+    on.stop("conversion", on.start())
+    text = on.render()
+    
+    ok = (
+        off.stages["conversion"].count == 0 and off.frames == 0
+        and 'tuner_stage_seconds_bucket{stage="pitch_estimate",le="0.005"} 3' in text
+        and 'tuner_stage_seconds_bucket{stage="pitch_estimate",le="+Inf"} 4' in text
+        and 'tuner_stage_seconds_count{stage="conversion"} 1' in text
+    )
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} disabled probes recorded nothing; "
+          f"{len(text.splitlines())} lines of Prometheus text when enabled")
+    print("-" * 60)
+    return ok
+
+
+def test_noise_gate():
+    """Test that the noise gate skips silence and the pluck transient"""
+    
+    print("\nTesting noise gate...")
+    print("-" * 60)
+    
+    import numpy as np
+    from pitch import NoiseGate
+    from config import SAMPLING_RATE, HOP_SIZE
+    
+    # 1 s of quiet noise, then a decaying 110 Hz pluck, hop by hop
+    rng = np.random.default_rng(0)
+    t = np.arange(2 * SAMPLING_RATE) / SAMPLING_RATE
+    pluck = np.where(t >= 1, np.exp(-3 * (t - 1)) * np.sin(2 * np.pi * 110 * t), 0)
+    audio = (20000 * pluck + 30 * rng.standard_normal(len(t))).astype(np.int16)
+    
+    gate = NoiseGate()
+    window = 4096
+    states = []
+    for end in range(window, len(audio), HOP_SIZE):
+        analyze = gate.update(audio[end - window:end], HOP_SIZE)
+        states.append((end / SAMPLING_RATE, gate.state, analyze))
+    
+    silent = [a for time, _, a in states if time < 1]
+    attack = [time for time, state, _ in states if state == NoiseGate.ATTACK]
+    sustain = [time for time, _, a in states if a]
+    ok = (
+        not any(silent)
+        and gate.onsets == 1
+        and attack and attack[-1] - attack[0] < 0.1
+        and sustain and sustain[0] > attack[-1]
+    )
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} {len(states)} frames: {len(states) - len(sustain)} gated, "
+          f"{gate.onsets} onset, attack {1000 * (sustain[0] - 1) if sustain else 0:.0f} ms")
+    print("-" * 60)
+    return ok
+
+
+def test_gate_transitions():
+    """Test the gate's attack and release transitions between two notes"""
+    
+    print("\nTesting noise gate transitions...")
+    print("-" * 60)
+    
+    import numpy as np
+    from pitch import NoiseGate
+    from config import SAMPLING_RATE, HOP_SIZE
+    
+    # A 110 Hz note cut to silence (release) and played again, then a
+    # louder 220 Hz pluck over it (attack) whose transient must not read
+    # as 110 Hz
+    rng = np.random.default_rng(1)
+    t = np.arange(3 * SAMPLING_RATE) / SAMPLING_RATE
+    first = (t < 1) | ((t >= 1.5) & (t < 2.2))
+    note = np.where(first, 0.2 * np.sin(2 * np.pi * 110 * t), 0)
+    note += np.where(t >= 2.2, np.exp(-2 * (t - 2.2)) * np.sin(2 * np.pi * 220 * t), 0)
+    audio = (16000 * note + 30 * rng.standard_normal(len(t))).astype(np.int16)
+    window = 4096
+    frames = [(end / SAMPLING_RATE, audio[end - window:end])
+              for end in range(window, len(audio), HOP_SIZE)]
+    
+    gate = NoiseGate()
+    states = []
+    for time, frame in frames:
+        gate.update(frame, HOP_SIZE)
+        states.append((time, gate.state))
+    
+    # Release: the gate closes once the cut has left the newest hop.
+    # Attack: reopening from silence and the louder pluck over a
+    # sustained note both hold analysis before the note is measured.
+    def onset(start, end):
+        after = [(time, state) for time, state in states if start <= time < end]
+        attack = [time for time, state in after if state == NoiseGate.ATTACK]
+        sustain = [time for time, state in after if state == NoiseGate.SUSTAIN]
+        return bool(attack and sustain) and attack[0] - start < 0.02 and attack[-1] < sustain[0]
+    
+    released = [time for time, state in states if 1 <= time < 1.5 and state == NoiseGate.SILENT]
+    before = [state for time, state in states if 2.1 < time < 2.2]
+    ok = (
+        released and released[0] - 1 < 0.02
+        and onset(1.5, 2.2)
+        and set(before) == {NoiseGate.SUSTAIN} and onset(2.2, 3)
+    )
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} gate closed {1000 * (released[0] - 1) if released else 0:.0f} ms after the cut, "
+          f"attack held after reopening and after the second pluck")
+    
+    # The processor reports no pitch for every gated frame, so the attack
+    # of the new note never repeats the previous note's frequency
+    try:
+        from audio import AudioProcessor
+    except ImportError as e:
+        print(f"⚠ Skipped audio processor - {e}")
+        print("-" * 60)
+        return ok
+    
+    from pitch import create_detector
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.gate = NoiseGate()
+    processor.detector = create_detector()
+    processor.targeted = processor._target_freq = processor.decimator = None
+    processor._scale = processor.detector.dtype.type(1 / 32768.0)
+    processor.frames_gated = processor.frames_analyzed = processor.detection_failures = 0
+    readings = []
+    for time, frame in frames:
+        freq = processor._analyze(frame, HOP_SIZE)
+        readings.append((time, processor.gate.state, freq))
+    
+    first = [freq for time, state, freq in readings if time < 2.2 and state == NoiseGate.SUSTAIN]
+    gated = [freq for _, state, freq in readings if state != NoiseGate.SUSTAIN]
+    second = [freq for time, state, freq in readings if time >= 2.2 and state == NoiseGate.SUSTAIN]
+    analyzer_ok = (
+        first and abs(np.median(first) - 110) < 1
+        and gated and not any(gated)
+        and second and abs(second[0] - 220) < 2
+    )
+    
+    mark = "✓" if analyzer_ok else "✗"
+    print(f"{mark} {len(gated)} gated frames read 0 Hz, first sustained frame of "
+          f"the new note {second[0] if second else 0:.1f} Hz")
+    print("-" * 60)
+    return ok and analyzer_ok
+
+
+def test_menu_wakeup():
+    """Test that an idle menu loop wakes on button presses and state changes"""
+    
+    print("\nTesting menu wake-up...")
+    print("-" * 60)
+    
+    import threading
+    import time
+    from hardware import HardwareController, FakeGPIO, FakeLCD
+    from state import AppState
+    from config import BTN_RIGHT, MENU_IDLE_TIMEOUT
+    
+    gpio = FakeGPIO()
+    hardware = HardwareController(gpio=gpio, lcd=FakeLCD())
+    state = AppState()
+    state.add_listener(hardware.wake)
+    
+    def timed_wait(action):
+        # Fire the action from another thread while the loop sleeps
+        timer = threading.Timer(0.05, action)
+        timer.start()
+        start = time.monotonic()
+        woken = hardware.wait_for_input(1.0)
+        timer.join()
+        return woken, time.monotonic() - start
+    
+    idle = hardware.wait_for_input(0.05)
+    press, press_time = timed_wait(lambda: gpio.press(BTN_RIGHT))
+    events = hardware.get_button_events()
+    gpio.release(BTN_RIGHT)
+    web, web_time = timed_wait(lambda: state.change_screen("tuning_menu"))
+    
+    ok = not idle and press and web and events == [BTN_RIGHT] and max(press_time, web_time) < 0.5
+    
+    mark = "✓" if ok else "✗"
+    print(f"{mark} button woke after {1000 * press_time:.0f} ms, "
+          f"state change after {1000 * web_time:.0f} ms")
+    
+    # The guitar selection screen shows a RIGHT press in the pass the
+    # press woke, not after the next idle timeout
+    try:
+        from main import GuitarTuner
+    except ImportError as e:
+        print(f"⚠ Skipped guitar selection - {e}")
+    else:
+        tuner = GuitarTuner.__new__(GuitarTuner)
+        tuner.hardware, tuner.state = hardware, state
+        tuner.guitar_options, tuner.guitar_index = ["6", "8"], 0
+        hardware.show_guitar_select()
+        tuner._handle_guitar_selection([])
+        hardware.display.flush(force=True)
+        before = hardware.lcd.text[1]
+        
+        # The loop pass the press wakes; a change held back by the LCD
+        # refresh cap goes out when the next idle wait ends, early
+        start = time.monotonic()
+        woken, _ = timed_wait(lambda: gpio.press(BTN_RIGHT))
+        tuner._handle_guitar_selection(hardware.get_button_events())
+        hardware.refresh_display()
+        if hardware.display.dirty:
+            hardware.wait_for_input(MENU_IDLE_TIMEOUT)
+            hardware.refresh_display()
+        shown_time = time.monotonic() - start
+        after = hardware.lcd.text[1]
+        
+        selected = (woken and before.startswith("6-String") and after.startswith("8-String")
+                    and shown_time < MENU_IDLE_TIMEOUT / 2)
+        ok = ok and selected
+        mark = "✓" if selected else "✗"
+        print(f"{mark} guitar selection row 1 after RIGHT: {after.strip()!r} "
+              f"in {1000 * shown_time:.0f} ms")
+    
+    hardware.cleanup()
+    print("-" * 60)
+    return ok
+
+
 def main():
     """Main test runner"""
     print("="*60)
@@ -105,6 +1458,33 @@ def main():
     # Test module imports
     success = test_imports()
     
+    # Compare the autocorrelation engines
+    success = test_engine_equivalence() and success
+    
+    # Test the allocation-free DSP path
+    success = test_allocations() and success
+    success = test_float32_accuracy() and success
+    success = test_decimation_accuracy() and success
+    success = test_targeted_accuracy() and success
+    success = test_ring_buffer() and success
+    success = test_pitch_worker() and success
+    success = test_process_worker() and success
+    success = test_adaptive_window() and success
+    success = test_tuning_tables() and success
+    success = test_chromatic_scale() and success
+    success = test_button_events() and success
+    success = test_lcd_framebuffer() and success
+    success = test_led_driver() and success
+    success = test_state_snapshots() and success
+    success = test_event_deltas() and success
+    success = test_status_etag() and success
+    success = test_static_assets() and success
+    success = test_pooled_server() and success
+    success = test_metrics() and success
+    success = test_noise_gate() and success
+    success = test_gate_transitions() and success
+    success = test_menu_wakeup() and success
+    
     if success:
         sys.exit(0)
     else:
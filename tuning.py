@@ -3,7 +3,133 @@ Tuning logic module
 Handles tuning data and string order management
 """
 
-from config import TUNING_FREQUENCIES, TUNINGS_6_STRING, TUNINGS_8_STRING
+import math
+from bisect import bisect_left
+from collections import namedtuple
+import numpy as np
+from config import (
+    TUNING_FREQUENCIES, TUNINGS_6_STRING, TUNINGS_8_STRING,
+    SEARCH_MARGIN_SEMITONES, MANUAL_SEARCH_SEMITONES,
+    CHROMATIC_TUNING, CHROMATIC_A4, CHROMATIC_MIN_FREQ, CHROMATIC_MAX_FREQ
+)
+
+
+NOTE_NAMES = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+
+
+def _frozen(values):
+    """Read-only float64 array"""
+    array = np.array(values, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+class TuningTable(namedtuple(
+        "TuningTable",
+        ["name", "order", "notes", "frequencies", "log2_frequencies", "boundaries"])):
+    """
+    Immutable, precompiled view of one tuning
+    
+    Strings are sorted once from lowest to highest. `boundaries` holds the
+    log2 midpoints between neighbouring strings, so the nearest string (in
+    cents) to any frequency is a single bisect.
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def compile(cls, name, tuning):
+        """Build the table for a {note: frequency} tuning dict"""
+        order = tuple(sorted(tuning.items(), key=lambda x: x[1]))
+        log2_freqs = [math.log2(freq) for _, freq in order]
+        boundaries = tuple((a + b) / 2 for a, b in zip(log2_freqs, log2_freqs[1:]))
+        return cls(
+            name=name,
+            order=order,
+            notes=tuple(note for note, _ in order),
+            frequencies=_frozen([freq for _, freq in order]),
+            log2_frequencies=_frozen(log2_freqs),
+            boundaries=boundaries
+        )
+    
+    def nearest(self, freq):
+        """
+        Find the string closest to a frequency
+        
+        Returns:
+            Tuple of (string_index, cents_offset), or (None, None) if freq <= 0
+        """
+        if not freq or freq <= 0:
+            return None, None
+        log2_freq = math.log2(freq)
+        idx = bisect_left(self.boundaries, log2_freq)
+        return idx, 1200 * (log2_freq - self.log2_frequencies[idx])
+
+
+class ChromaticScale(namedtuple(
+        "ChromaticScale",
+        ["a4", "offset", "notes", "frequencies", "lcd", "positions"])):
+    """
+    Immutable equal-temperament note table for chromatic mode
+    
+    Entry i is the note `offset + i` semitones away from A4. The nearest
+    note to a frequency is round(12 * log2(f / A4)), so a lookup is one
+    log and an index into the precomputed names, frequencies and LCD lines.
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def compile(cls, a4, min_freq, max_freq):
+        """Build the table for every note between min_freq and max_freq"""
+        first = math.ceil(12 * math.log2(min_freq / a4))
+        last = math.floor(12 * math.log2(max_freq / a4))
+        notes, freqs, lcd = [], [], []
+        for n in range(first, last + 1):
+            midi = 69 + n
+            note = f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}"
+            freq = a4 * 2 ** (n / 12)
+            notes.append(note)
+            freqs.append(freq)
+            lcd.append(f"Note:{note} {freq:.1f}Hz"[:16].ljust(16))
+        return cls(
+            a4=a4,
+            offset=first,
+            notes=tuple(notes),
+            frequencies=_frozen(freqs),
+            lcd=tuple(lcd),
+            positions={note: i for i, note in enumerate(notes)}
+        )
+    
+    def lookup(self, freq):
+        """
+        Find the nearest note to a frequency
+        
+        Returns:
+            Tuple of (note_index, note_name, note_freq, cents_offset), or
+            all None if freq is not positive or outside the table
+        """
+        if not freq or freq <= 0:
+            return None, None, None, None
+        semitones = 12 * math.log2(freq / self.a4)
+        n = round(semitones)
+        idx = n - self.offset
+        if not 0 <= idx < len(self.notes):
+            return None, None, None, None
+        return idx, self.notes[idx], float(self.frequencies[idx]), 100 * (semitones - n)
+    
+    def lcd_line(self, note):
+        """Precomputed LCD line for a note name ("---" if unknown)"""
+        idx = self.positions.get(note)
+        return "Note:---".ljust(16) if idx is None else self.lcd[idx]
+
+
+# Compiled once at import; TuningManager lookups never sort again
+TUNING_TABLES = {
+    name: TuningTable.compile(name, tuning)
+    for name, tuning in TUNING_FREQUENCIES.items()
+}
+CHROMATIC_SCALE = ChromaticScale.compile(CHROMATIC_A4, CHROMATIC_MIN_FREQ, CHROMATIC_MAX_FREQ)
 
 
 class TuningManager:
@@ -35,13 +161,37 @@ class TuningManager:
             tuning_name: Name of the tuning
         
         Returns:
-            List of (note_name, frequency) tuples sorted by frequency
+            Tuple of (note_name, frequency) tuples sorted by frequency
         """
-        if tuning_name not in TUNING_FREQUENCIES:
-            return []
+        table = TUNING_TABLES.get(tuning_name)
+        return table.order if table else ()
+    
+    @staticmethod
+    def get_table(tuning_name):
+        """Get the compiled TuningTable for a tuning (None if unknown)"""
+        return TUNING_TABLES.get(tuning_name)
+    
+    @staticmethod
+    def is_chromatic(tuning_name):
+        """True for the chromatic (any note) pseudo-tuning"""
+        return tuning_name == CHROMATIC_TUNING
+    
+    @staticmethod
+    def get_note(tuning_name, index):
+        """
+        Get the note name for a string index (a note index in chromatic mode)
         
-        tuning = TUNING_FREQUENCIES[tuning_name]
-        return sorted(tuning.items(), key=lambda x: x[1])
+        Returns:
+            Note name, or None if the index is out of range
+        """
+        if index is None:
+            return None
+        if tuning_name == CHROMATIC_TUNING:
+            notes = CHROMATIC_SCALE.notes
+        else:
+            table = TUNING_TABLES.get(tuning_name)
+            notes = table.notes if table else ()
+        return notes[index] if 0 <= index < len(notes) else None
     
     @staticmethod
     def find_closest_string(detected_freq, tuning_name):
@@ -56,28 +206,103 @@ class TuningManager:
         Returns:
             Tuple of (string_index, note_name, target_freq, cents_offset)
         """
-        if tuning_name not in TUNING_FREQUENCIES:
+        if tuning_name == CHROMATIC_TUNING:
+            return CHROMATIC_SCALE.lookup(detected_freq)
+        
+        table = TUNING_TABLES.get(tuning_name)
+        if table is None:
             return None, None, None, None
         
-        from audio import AudioProcessor
+        idx, cents = table.nearest(detected_freq)
+        if idx is None:
+            return None, None, None, None
+        
+        note, target_freq = table.order[idx]
+        return idx, note, target_freq, cents
+    
+    @staticmethod
+    def match_string(detected_freq, tuning_name, string_index, auto_detect):
+        """
+        Match a detected frequency against the string being tuned
+        
+        Args:
+            detected_freq: Detected frequency in Hz
+            tuning_name: Current tuning name
+            string_index: Selected string (ignored in auto mode)
+            auto_detect: Pick the closest string instead of the selected one
+        
+        Returns:
+            Tuple of (string_index, note_name, target_freq, cents_offset)
+        """
+        if auto_detect or tuning_name == CHROMATIC_TUNING:
+            return TuningManager.find_closest_string(detected_freq, tuning_name)
+        
+        order = TuningManager.get_string_order(tuning_name)
+        if string_index >= len(order):
+            return string_index, None, None, None
+        
+        note, target_freq = order[string_index]
+        cents = 1200 * math.log2(detected_freq / target_freq) if detected_freq else None
+        return string_index, note, target_freq, cents
+    
+    @staticmethod
+    def get_search_range(tuning_name, string_index, auto_detect):
+        """
+        Get the pitch search band for the current tuner target
+        
+        Auto and chromatic mode span the whole tuning; manual mode narrows
+        to the selected string.
         
-        min_diff = 1e6
-        closest_string = None
-        closest_index = None
-        target_freq = None
+        Returns:
+            Tuple of (min_freq, max_freq), or (None, None) if unknown
+        """
+        if auto_detect or tuning_name == CHROMATIC_TUNING:
+            return TuningManager.get_frequency_range(tuning_name, SEARCH_MARGIN_SEMITONES)
+        return TuningManager.get_string_range(tuning_name, string_index, MANUAL_SEARCH_SEMITONES)
+    
+    @staticmethod
+    def get_frequency_range(tuning_name, margin_semitones=0):
+        """
+        Get the frequency band spanned by a tuning
         
-        tuning = TUNING_FREQUENCIES[tuning_name]
-        string_order = sorted(tuning.items(), key=lambda x: x[1])
+        Args:
+            tuning_name: Name of the tuning
+            margin_semitones: Extra range added below and above
+        
+        Returns:
+            Tuple of (min_freq, max_freq), or (None, None) if unknown
+        """
+        if tuning_name == CHROMATIC_TUNING:
+            freqs = CHROMATIC_SCALE.frequencies
+        else:
+            table = TUNING_TABLES.get(tuning_name)
+            if table is None:
+                return None, None
+            freqs = table.frequencies
         
-        for idx, (note, freq) in enumerate(string_order):
-            cents = AudioProcessor.freq_to_cents(detected_freq, freq)
-            if cents is not None and abs(cents) < abs(min_diff):
-                min_diff = cents
-                closest_string = note
-                closest_index = idx
-                target_freq = freq
+        factor = 2 ** (margin_semitones / 12)
+        return float(freqs[0]) / factor, float(freqs[-1]) * factor
+    
+    @staticmethod
+    def get_string_range(tuning_name, string_index, margin_semitones=1):
+        """
+        Get the frequency band around a single string
+        
+        Args:
+            tuning_name: Name of the tuning
+            string_index: Index into the sorted string order
+            margin_semitones: Range below and above the target note
+        
+        Returns:
+            Tuple of (min_freq, max_freq), or (None, None) if unknown
+        """
+        order = TuningManager.get_string_order(tuning_name)
+        if string_index >= len(order):
+            return None, None
         
-        return closest_index, closest_string, target_freq, min_diff
+        freq = order[string_index][1]
+        factor = 2 ** (margin_semitones / 12)
+        return freq / factor, freq * factor
     
     @staticmethod
     def get_max_strings(instrument):
@@ -3,20 +3,27 @@ Web interface module
 Flask-based web server for remote control and monitoring
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, redirect, jsonify, g
+import gzip
+import hashlib
+import json
+import os
 import threading
-from tuning import TuningManager
-from config import WEB_HOST, WEB_PORT
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from tuning import TuningManager, CHROMATIC_SCALE
+from metrics import METRICS
+from config import (
+    WEB_HOST, WEB_PORT, EVENTS_BACKLOG, EVENTS_KEEPALIVE, STATIC_MAX_AGE,
+    WEB_SERVER, WEB_WORKERS, WEB_BACKLOG, WEB_CLIENT_TIMEOUT,
+    EVENTS_MAX_SUBSCRIBERS
+)
 
 
-# HTML template for the web interface
-HTML_TEMPLATE = """ 
-<!DOCTYPE html>
-<html>
-<head>
-<meta name="viewport" content="width=device-width, initial-scale=1">
-<title>Zajebisty Stroik Inator</title>
-<style>
+# Stylesheet and script of the web interface, served as fingerprinted
+# static assets (see StaticAsset)
+STYLE_CSS = """
 * { margin: 0; padding: 0; box-sizing: border-box; }
 body {
     background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
@@ -205,9 +212,124 @@ button:active {
     color: #ff0000;
     border: 2px solid #ff0000;
 }
-</style>
+"""
+
+SCRIPT_JS = """
+let currentScreenState = document.body.dataset.screen;
+let live = {};
+
+function render(d) {
+    if (d.current_screen !== currentScreenState) {
+        window.location.href = "/";
+        return;
+    }
+
+    if (document.getElementById("current-string")) {
+        document.getElementById("current-string").innerText = d.current_note;
+        document.getElementById("target-freq").innerText = "Frequency: " + d.target_freq + " Hz";
+        
+        const centsEl = document.getElementById("cents-display");
+        const statusEl = document.getElementById("status");
+        
+        if (d.cents === "---") {
+            centsEl.innerText = "--- cents";
+            centsEl.className = "cents-display";
+            statusEl.innerText = "Waiting for sound...";
+            statusEl.className = "status-indicator";
+        } else {
+            const cents = parseFloat(d.cents);
+            const sign = d.cents_raw >= 0 ? "+" : "";
+            centsEl.innerText = sign + d.cents_raw.toFixed(1) + " cents";
+            
+            if (Math.abs(cents) <= 15) {
+                centsEl.className = "cents-display tuned";
+                statusEl.className = "status-indicator tuned";
+                statusEl.innerText = "IN TUNE";
+            } else if (Math.abs(cents) <= 30) {
+                centsEl.className = "cents-display close";
+                statusEl.className = "status-indicator tuning";
+                statusEl.innerText = d.cents_raw > 0 ? "A bit too high" : "A bit too low";
+            } else {
+                centsEl.className = "cents-display far";
+                statusEl.className = "status-indicator out";
+                statusEl.innerText = d.cents_raw > 0 ? "Too high" : "Too low";
+            }
+            
+            let pos = Math.max(0, Math.min(100, 50 + (d.cents_raw / 100 * 50)));
+            document.getElementById("indicator").style.left = pos + "%";
+            document.getElementById("indicator").style.transform = "translateX(-50%)";
+            
+            if (Math.abs(cents) <= 15) {
+                document.getElementById("indicator").style.background = "#00ff00";
+                document.getElementById("indicator").style.boxShadow = "0 0 20px rgba(0, 255, 0, 0.8)";
+            } else if (Math.abs(cents) <= 30) {
+                document.getElementById("indicator").style.background = "#ffff00";
+                document.getElementById("indicator").style.boxShadow = "0 0 20px rgba(255, 255, 0, 0.8)";
+            } else {
+                document.getElementById("indicator").style.background = "#ff0000";
+                document.getElementById("indicator").style.boxShadow = "0 0 20px rgba(255, 0, 0, 0.8)";
+            }
+        }
+        
+        const grid = document.getElementById("string-grid");
+        if (grid && d.all_strings) {
+            grid.innerHTML = "";
+            d.all_strings.forEach((str, idx) => {
+                const div = document.createElement("div");
+                div.className = "string-item";
+                if (d.tuned_strings && d.tuned_strings.includes(str.name)) div.classList.add("tuned");
+                if (idx === d.current_string_index) div.classList.add("current");
+                div.innerHTML = `<div class="string-name">${str.name}</div><div class="string-freq">${str.freq} Hz</div>`;
+                grid.appendChild(div);
+            });
+        }
+    }
+}
+
+function updateDisplay() {
+    fetch("/status").then(r=>r.json()).then(render);
+}
+
+function startPolling() {
+    setInterval(updateDisplay, 300);
+    updateDisplay();
+}
+
+// Submit forms in the background; only a screen change reloads the page
+document.querySelectorAll("form").forEach(form => {
+    form.addEventListener("submit", e => {
+        e.preventDefault();
+        const body = new URLSearchParams();
+        if (e.submitter && e.submitter.name) body.append(e.submitter.name, e.submitter.value);
+        fetch(form.action, {method: "POST", body, headers: {"Accept": "application/json"}})
+            .then(r => r.json())
+            .then(d => { if (d.screen !== currentScreenState) window.location.href = "/"; });
+    });
+});
+
+if (window.EventSource) {
+    // Pushed state: a snapshot on connect, then only the changed fields
+    const events = new EventSource("/events");
+    events.addEventListener("snapshot", e => { live = JSON.parse(e.data); render(live); });
+    events.onmessage = e => { Object.assign(live, JSON.parse(e.data)); render(live); };
+    // Refused (server busy): poll instead
+    events.onerror = () => { if (events.readyState === EventSource.CLOSED) startPolling(); };
+} else {
+    startPolling();
+}
+"""
+
+
+# HTML template for the web interface
+HTML_TEMPLATE = """ 
+<!DOCTYPE html>
+<html>
+<head>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Zajebisty Stroik Inator</title>
+<link rel="stylesheet" href="{{ css_url }}">
 </head>
-<body>
+<body data-screen="{{ screen }}">
 <div class="container">
     <h1>Zajebisty Stroik Inator</h1>
     
@@ -280,85 +402,185 @@ button:active {
     {% endif %}
 </div>
 
-<script>
-let currentScreenState = "{{ screen }}";
+<script src="{{ js_url }}"></script>
+</body>
+</html>
+""" 
 
-function updateDisplay() {
-    fetch("/status").then(r=>r.json()).then(d=>{
-        if (d.current_screen !== currentScreenState) {
-            window.location.href = "/";
-            return;
-        }
 
-        if (document.getElementById("current-string")) {
-            document.getElementById("current-string").innerText = d.current_note;
-            document.getElementById("target-freq").innerText = "Frequency: " + d.target_freq + " Hz";
-            
-            const centsEl = document.getElementById("cents-display");
-            const statusEl = document.getElementById("status");
-            
-            if (d.cents === "---") {
-                centsEl.innerText = "--- cents";
-                centsEl.className = "cents-display";
-                statusEl.innerText = "Waiting for sound...";
-                statusEl.className = "status-indicator";
-            } else {
-                const cents = parseFloat(d.cents);
-                const sign = d.cents_raw >= 0 ? "+" : "";
-                centsEl.innerText = sign + d.cents_raw.toFixed(1) + " cents";
-                
-                if (Math.abs(cents) <= 15) {
-                    centsEl.className = "cents-display tuned";
-                    statusEl.className = "status-indicator tuned";
-                    statusEl.innerText = "IN TUNE";
-                } else if (Math.abs(cents) <= 30) {
-                    centsEl.className = "cents-display close";
-                    statusEl.className = "status-indicator tuning";
-                    statusEl.innerText = d.cents_raw > 0 ? "A bit too high" : "A bit too low";
-                } else {
-                    centsEl.className = "cents-display far";
-                    statusEl.className = "status-indicator out";
-                    statusEl.innerText = d.cents_raw > 0 ? "Too high" : "Too low";
-                }
-                
-                let pos = Math.max(0, Math.min(100, 50 + (d.cents_raw / 100 * 50)));
-                document.getElementById("indicator").style.left = pos + "%";
-                document.getElementById("indicator").style.transform = "translateX(-50%)";
-                
-                if (Math.abs(cents) <= 15) {
-                    document.getElementById("indicator").style.background = "#00ff00";
-                    document.getElementById("indicator").style.boxShadow = "0 0 20px rgba(0, 255, 0, 0.8)";
-                } else if (Math.abs(cents) <= 30) {
-                    document.getElementById("indicator").style.background = "#ffff00";
-                    document.getElementById("indicator").style.boxShadow = "0 0 20px rgba(255, 255, 0, 0.8)";
-                } else {
-                    document.getElementById("indicator").style.background = "#ff0000";
-                    document.getElementById("indicator").style.boxShadow = "0 0 20px rgba(255, 0, 0, 0.8)";
-                }
-            }
-            
-            const grid = document.getElementById("string-grid");
-            if (grid && d.all_strings) {
-                grid.innerHTML = "";
-                d.all_strings.forEach((str, idx) => {
-                    const div = document.createElement("div");
-                    div.className = "string-item";
-                    if (d.tuned_strings && d.tuned_strings.includes(str.name)) div.classList.add("tuned");
-                    if (idx === d.current_string_index) div.classList.add("current");
-                    div.innerHTML = `<div class="string-name">${str.name}</div><div class="string-freq">${str.freq} Hz</div>`;
-                    grid.appendChild(div);
-                });
-            }
-        }
-    });
+class StaticAsset(namedtuple("StaticAsset", ["name", "url", "mimetype", "body", "gzipped"])):
+    """
+    Static file prepared once at startup
+    
+    The URL carries a content hash, so it can be cached for STATIC_MAX_AGE
+    and a changed file simply gets a new URL. The gzip body is compressed
+    once, not per request.
+    """
+    
+    __slots__ = ()
+    
+    @classmethod
+    def build(cls, name, text, mimetype):
+        body = text.encode()
+        digest = hashlib.sha256(body).hexdigest()[:12]
+        stem, ext = name.rsplit(".", 1)
+        return cls(
+            name=name,
+            url=f"/assets/{stem}.{digest}.{ext}",
+            mimetype=mimetype,
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=9)
+        )
+    
+    def response(self):
+        """Long-lived response, gzipped when the client accepts it"""
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = Response(self.gzipped, mimetype=self.mimetype)
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(self.body, mimetype=self.mimetype)
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        return response
+
+
+STATIC_ASSETS = {
+    asset.url: asset for asset in (
+        StaticAsset.build("tuner.css", STYLE_CSS, "text/css"),
+        StaticAsset.build("tuner.js", SCRIPT_JS, "application/javascript"),
+    )
 }
+CSS_URL, JS_URL = (asset.url for asset in STATIC_ASSETS.values())
 
-setInterval(updateDisplay, 300);
-updateDisplay();
-</script>
-</body>
-</html>
-""" 
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler without per-request logging and with a socket timeout"""
+    
+    timeout = WEB_CLIENT_TIMEOUT
+    
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server handling connections on a fixed pool of threads
+    
+    Accepting stays on the serving thread; each connection is handed to
+    one of `workers` threads. A connection is only accepted once a worker
+    is free, so when all are busy new clients wait in the kernel listen
+    backlog (`backlog` deep) instead of piling up in the process.
+    """
+    
+    # Requests run on pool threads (sets environ["wsgi.multithread"])
+    multithread = True
+    
+    # Seconds between shutdown checks while waiting for a free worker
+    SLOT_POLL = 0.5
+    
+    def __init__(self, host, port, app, workers=WEB_WORKERS, backlog=WEB_BACKLOG):
+        self.request_queue_size = backlog
+        super().__init__(host, port, app, handler=QuietRequestHandler)
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="web")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._closing = False
+    
+    def get_request(self):
+        """Accept the next connection once a worker is free"""
+        while not self._slots.acquire(timeout=self.SLOT_POLL):
+            if self._closing:
+                raise OSError("server is shutting down")
+        try:
+            return super().get_request()
+        except OSError:
+            self._slots.release()
+            raise
+    
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+    
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def shutdown_request(self, request):
+        # Every accepted connection ends here exactly once, whether it was
+        # served, rejected or failed to be handed to the pool
+        super().shutdown_request(request)
+        self._slots.release()
+    
+    def shutdown(self):
+        self._closing = True
+        super().shutdown()
+    
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class EventHub:
+    """
+    Single-producer fan-out for server-sent events
+    
+    The producer encodes each event once into a shared backlog and wakes
+    every subscriber; subscribers stream whatever is newer than the last
+    sequence number they sent. A subscriber that falls more than the
+    backlog behind is told to resync with a fresh snapshot.
+    """
+    
+    def __init__(self, backlog=EVENTS_BACKLOG):
+        self._events = deque(maxlen=backlog)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.subscribers = 0
+    
+    def subscribe(self):
+        """
+        Register a subscriber
+        
+        Returns:
+            Sequence number to stream events after
+        """
+        with self._cond:
+            self.subscribers += 1
+            return self._seq
+    
+    def unsubscribe(self):
+        """Drop a subscriber (its stream was closed)"""
+        with self._cond:
+            self.subscribers -= 1
+    
+    def publish(self, data, event=None):
+        """Encode an event once and wake all subscribers"""
+        message = f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+        if event:
+            message = f"event: {event}\n{message}"
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, message.encode()))
+            self._cond.notify_all()
+    
+    def wait(self, after, timeout):
+        """
+        Wait for events newer than a sequence number
+        
+        Returns:
+            (events, newest_seq); events is None if the subscriber fell
+            out of the backlog, and empty on timeout
+        """
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait(timeout)
+            if self._seq <= after:
+                return [], after
+            if not self._events or self._events[0][0] > after + 1:
+                return None, self._seq
+            return [m for seq, m in self._events if seq > after], self._seq
 
 
 class WebInterface:
@@ -366,96 +588,265 @@ class WebInterface:
     
     def __init__(self, app_state):
         self.app_state = app_state
-        self.app = Flask(__name__)
+        self.app = Flask(__name__, static_folder=None)
+        
+        # Page template compiled once; rendered pages cached per screen
+        self._template = self.app.jinja_env.from_string(HTML_TEMPLATE)
+        self._pages = {}
+        self.events = EventHub()
+        self._pushed = {}
+        self._pushed_tuning = None
+        self._pushed_generation = None
+        
+        # /status body cached per AppState generation; the boot id keeps
+        # ETags from a previous run from matching after a restart
+        self._boot_id = os.urandom(4).hex()
+        self._status_cache = (None, None, None)
+        self.server = None
+        self._max_subscribers = None
         self._setup_routes()
     
+    # ============================================================
+    # STATUS DATA
+    # ============================================================
+    # Every builder reads one StateSnapshot, so a payload never mixes
+    # fields from before and after a change
+    @staticmethod
+    def _tuning(snapshot):
+        """(tuning_name, string order) of a snapshot"""
+        tunings_list = TuningManager.get_tunings_list(snapshot.instrument)
+        tuning_name = tunings_list[snapshot.selected_tuning_index] if tunings_list else "---"
+        return tuning_name, TuningManager.get_string_order(tuning_name)
+    
+    def _static_status(self, snapshot):
+        """Fields that only change with the instrument or tuning"""
+        tuning_name, order = self._tuning(snapshot)
+        return {
+            "instrument": snapshot.instrument,
+            "tuning": tuning_name,
+            "all_strings": [{"name": n, "freq": f} for n, f in order]
+        }
+    
+    def _live_status(self, snapshot):
+        """Fields that change with every reading or button press"""
+        state = snapshot
+        tuning_name, order = self._tuning(snapshot)
+        index = state.current_string_index
+        if TuningManager.is_chromatic(tuning_name):
+            # No strings: show the detected note and its reference pitch
+            note_index = CHROMATIC_SCALE.positions.get(state.last_note)
+            current_note = state.last_note
+            target_freq = CHROMATIC_SCALE.frequencies[note_index] if note_index is not None else 0
+        else:
+            current_note = order[index][0] if index < len(order) else "---"
+            target_freq = order[index][1] if index < len(order) else 0
+        return {
+            "current_note": current_note,
+            "target_freq": f"{target_freq:.2f}",
+            "cents": state.last_cents,
+            "cents_raw": round(state.last_cents_raw, 1),
+            "current_string_index": index,
+            "tuned_strings": list(state.tuned_strings),
+            "current_screen": state.current_screen
+        }
+    
+    def publish(self):
+        """
+        Push state changes to /events subscribers
+        
+        Called by the main loop after each reading. Only changed fields
+        are sent; the string list only when the tuning changes.
+        """
+        if not self.events.subscribers:
+            self._pushed_tuning = None
+            self._pushed = {}
+            self._pushed_generation = None
+            return
+        
+        snapshot = self.app_state.snapshot
+        if snapshot.generation == self._pushed_generation:
+            return
+        self._pushed_generation = snapshot.generation
+        
+        tuning = (snapshot.instrument, snapshot.selected_tuning_index)
+        if tuning != self._pushed_tuning:
+            self._pushed_tuning = tuning
+            self._pushed = {}
+            self.events.publish(self._static_status(snapshot))
+        
+        live = self._live_status(snapshot)
+        delta = {k: v for k, v in live.items() if self._pushed.get(k) != v}
+        if delta:
+            self._pushed = live
+            self.events.publish(delta)
+    
+    def _status_payload(self):
+        """
+        Serialized /status body and ETag for the current state generation
+        
+        The JSON is only rebuilt when AppState.generation has moved on.
+        """
+        snapshot = self.app_state.snapshot
+        generation = snapshot.generation
+        cached_generation, body, etag = self._status_cache
+        if generation != cached_generation:
+            status = {**self._static_status(snapshot), **self._live_status(snapshot)}
+            body = json.dumps(status, separators=(",", ":")).encode()
+            etag = f"{self._boot_id}-{generation}"
+            self._status_cache = (generation, body, etag)
+        return body, etag
+    
+    def _stream_events(self):
+        """Generator behind /events: snapshot, then deltas and keep-alives"""
+        hub = self.events
+        seq = hub.subscribe()
+        try:
+            while True:
+                snapshot = self.app_state.snapshot
+                status = {**self._static_status(snapshot), **self._live_status(snapshot)}
+                yield f"event: snapshot\ndata: {json.dumps(status)}\n\n".encode()
+                while True:
+                    messages, seq = hub.wait(seq, EVENTS_KEEPALIVE)
+                    if messages is None:
+                        break
+                    yield b"".join(messages) if messages else b": keep-alive\n\n"
+        finally:
+            hub.unsubscribe()
+    
     def _setup_routes(self):
         """Configure Flask routes"""
         
+        if METRICS.enabled:
+            # Time every request (the hooks are not installed when metrics are off)
+            @self.app.before_request
+            def start_timer():
+                g.metrics_start = METRICS.start()
+            
+            @self.app.after_request
+            def stop_timer(response):
+                METRICS.stop("web_request", g.metrics_start)
+                return response
+        
         @self.app.route("/")
         def index():
-            tunings_list = TuningManager.get_tunings_list(self.app_state.instrument)
-            tuning_name = tunings_list[self.app_state.selected_tuning_index] if tunings_list else None
-            all_strings_data = []
-            
-            if tuning_name:
-                order = TuningManager.get_string_order(tuning_name)
-                for note, freq in order:
-                    all_strings_data.append({"name": note, "freq": freq})
-            
-            return render_template_string(
-                HTML_TEMPLATE,
-                tunings=tunings_list,
-                instrument=self.app_state.instrument,
-                screen=self.app_state.current_screen,
-                tuning=tuning_name,
-                all_strings=all_strings_data
-            )
+            state = self.app_state.snapshot
+            key = (state.instrument, state.current_screen, state.selected_tuning_index)
+            page = self._pages.get(key)
+            if page is None:
+                tunings_list = TuningManager.get_tunings_list(state.instrument)
+                tuning_name = tunings_list[state.selected_tuning_index] if tunings_list else None
+                page = self._template.render(
+                    tunings=tunings_list,
+                    instrument=state.instrument,
+                    screen=state.current_screen,
+                    tuning=tuning_name,
+                    css_url=CSS_URL,
+                    js_url=JS_URL
+                )
+                self._pages[key] = page
+            return page
+        
+        @self.app.route("/assets/<name>")
+        def asset(name):
+            asset = STATIC_ASSETS.get(f"/assets/{name}")
+            if asset is None:
+                return "Not found", 404
+            return asset.response()
+        
+        def done():
+            """
+            Reply to a POST: small JSON for background (fetch) submits,
+            otherwise a redirect so the browser reloads the page with GET
+            """
+            if request.accept_mimetypes.best == "application/json":
+                snapshot = self.app_state.snapshot
+                return jsonify({
+                    "screen": snapshot.current_screen,
+                    "generation": snapshot.generation
+                })
+            return redirect("/", code=303)
         
         @self.app.route("/select_guitar", methods=["POST"])
         def select_guitar_web():
-            self.app_state.set_instrument(request.form["instrument"])
-            self.app_state.change_screen("tuning_menu")
-            return index()
+            self.app_state.set_instrument(request.form["instrument"], screen="tuning_menu")
+            return done()
         
         @self.app.route("/set_tuning", methods=["POST"])
         def set_tuning_web():
             tunings_list = TuningManager.get_tunings_list(self.app_state.instrument)
             name = request.form["tuning"]
             if name in tunings_list:
-                self.app_state.selected_tuning_index = tunings_list.index(name)
-                self.app_state.reset_tuning_state()
-                self.app_state.change_screen("tuner")
-            return index()
+                self.app_state.select_tuning(tunings_list.index(name), screen="tuner")
+            return done()
         
         @self.app.route("/change_string", methods=["POST"])
         def change_string_web():
             direction = int(request.form["dir"])
             max_str = TuningManager.get_max_strings(self.app_state.instrument)
             self.app_state.navigate_string(direction, max_str)
-            return index()
+            return done()
         
         @self.app.route("/back_to_guitar", methods=["POST"])
         def back_to_guitar():
-            self.app_state.instrument = None
-            self.app_state.reset_tuning_state()
-            self.app_state.change_screen("select_guitar")
-            return index()
+            self.app_state.clear_instrument(screen="select_guitar")
+            return done()
         
         @self.app.route("/back_to_tuning", methods=["POST"])
         def back_to_tuning():
-            self.app_state.reset_tuning_state()
-            self.app_state.change_screen("tuning_menu")
-            return index()
+            self.app_state.reset_tuning_state(screen="tuning_menu")
+            return done()
         
         @self.app.route("/status")
         def status():
-            tunings_list = TuningManager.get_tunings_list(self.app_state.instrument)
-            tuning_name = tunings_list[self.app_state.selected_tuning_index] if tunings_list else "---"
-            order = TuningManager.get_string_order(tuning_name)
-            
-            current_note = order[self.app_state.current_string_index][0] if self.app_state.current_string_index < len(order) else "---"
-            target_freq = order[self.app_state.current_string_index][1] if self.app_state.current_string_index < len(order) else 0
-            
-            all_strings_data = [{"name": n, "freq": f} for n, f in order]
-            
-            return jsonify({
-                "instrument": self.app_state.instrument,
-                "tuning": tuning_name,
-                "current_note": current_note,
-                "target_freq": f"{target_freq:.2f}",
-                "cents": self.app_state.last_cents,
-                "cents_raw": self.app_state.last_cents_raw,
-                "current_string_index": self.app_state.current_string_index,
-                "tuned_strings": list(self.app_state.tuned_strings.keys()),
-                "current_screen": self.app_state.current_screen,
-                "all_strings": all_strings_data
-            })
-    
-    def start(self):
-        """Start the web server in a background thread"""
-        def run_web():
-            self.app.run(host=WEB_HOST, port=WEB_PORT, debug=False, use_reloader=False)
+            body, etag = self._status_payload()
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype="application/json")
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        
+        @self.app.route("/events")
+        def events():
+            # Streams hold a worker for their whole life; past the limit
+            # the page falls back to polling /status
+            if self._max_subscribers is not None and self.events.subscribers >= self._max_subscribers:
+                return Response("Too many event streams", status=503)
+            return Response(
+                self._stream_events(),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        
+        @self.app.route("/metrics")
+        def metrics():
+            if not METRICS.enabled:
+                return "Metrics are disabled (METRICS_ENABLED)", 404
+            return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+    
+    def start(self, mode=WEB_SERVER, host=WEB_HOST, port=WEB_PORT):
+        """
+        Start the web server in a background thread
+        
+        Args:
+            mode: "development" (Flask's server) or "pooled" (fixed
+                WEB_WORKERS thread pool, see PooledWSGIServer)
+        """
+        if mode == "pooled":
+            self.server = PooledWSGIServer(host, port, self.app)
+            self._max_subscribers = min(EVENTS_MAX_SUBSCRIBERS, WEB_WORKERS - 1)
+            run_web = self.server.serve_forever
+        else:
+            def run_web():
+                self.app.run(host=host, port=port, debug=False, use_reloader=False)
         
         thread = threading.Thread(target=run_web, daemon=True)
         thread.start()
+    
+    def stop(self):
+        """Stop the pooled server (the development server stops with the process)"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
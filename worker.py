@@ -0,0 +1,452 @@
+"""
+DSP worker module
+Runs pitch detection off the UI loop and publishes the latest reading
+"""
+
+import multiprocessing
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+from tuning import TuningManager
+from metrics import METRICS
+from config import (
+    PITCH_SEARCH_MODE, READING_MAX_AGE, DSP_BACKEND,
+    TUNING_FREQUENCIES, DECIMATION, TARGETED_DETECTION, ADAPTIVE_WINDOW,
+    CHROMATIC_TUNING
+)
+
+
+# One published tuner reading. `target` is the (tuning_name, string_index,
+# auto_detect) tuple the reading was matched against; `timestamp` is the
+# time.monotonic() capture time of the end of the analyzed audio window.
+PitchReading = namedtuple(
+    "PitchReading",
+    ["frequency", "confidence", "string_index", "note", "target_freq",
+     "cents", "target", "timestamp"]
+)
+
+EMPTY_READING = PitchReading(0, 0.0, None, None, None, None, None, 0.0)
+
+
+class PitchWorker:
+    """
+    Pitch detection pipeline with a single-slot result mailbox
+    
+    step() reads one frame, matches it against the current target and
+    publishes an immutable PitchReading. Publishing and reading are plain
+    attribute assignments of immutable objects, so the slot needs no lock.
+    The pipeline can be stepped inline by the UI loop or run on its own
+    thread with start().
+    """
+    
+    def __init__(self, audio):
+        self.audio = audio
+        self._target = None
+        self._range_target = None
+        self._reading = EMPTY_READING
+        self._running = False
+        self._thread = None
+    
+    # ============================================================
+    # TARGET AND RESULT SLOTS
+    # ============================================================
+    def set_target(self, tuning_name, string_index, auto_detect):
+        """Set the tuning and string that readings are matched against"""
+        self._target = (tuning_name, string_index, auto_detect)
+    
+    def clear_target(self):
+        """Stop analyzing (and capturing) audio until a new target is set"""
+        self._target = None
+        if not self._running:
+            # Inline: the caller owns the stream, pause it right away
+            self.audio.suspend()
+    
+    @property
+    def latest(self):
+        """Most recent published reading"""
+        return self._reading
+    
+    def read(self, target, max_age=READING_MAX_AGE):
+        """
+        Get the latest reading if it is fresh and matches a target
+        
+        Args:
+            target: (tuning_name, string_index, auto_detect) expected by the caller
+            max_age: Oldest acceptable reading in seconds
+        
+        Returns:
+            PitchReading, or EMPTY_READING if stale or for another target
+        """
+        reading = self.latest
+        if reading.target != target or time.monotonic() - reading.timestamp > max_age:
+            return EMPTY_READING
+        return reading
+    
+    # ============================================================
+    # PIPELINE
+    # ============================================================
+    def step(self, block=False):
+        """
+        Detect pitch for one frame and publish the reading
+        
+        Returns:
+            True if a reading was published
+        """
+        target = self._target
+        if target is None:
+            # Nobody is tuning: pause capture (detect_pitch resumes it)
+            self.audio.suspend()
+            return False
+        
+        # Adapt decimation and search band to the strings we can be tuning
+        if target != self._range_target:
+            self._configure_for(target)
+        
+        freq = self.audio.detect_pitch(block=block)
+        start = METRICS.start()
+        idx, note, target_freq, cents = TuningManager.match_string(freq, *target)
+        METRICS.stop("string_match", start)
+        
+        self._reading = PitchReading(
+            frequency=freq,
+            confidence=self.audio.last_confidence,
+            string_index=idx,
+            note=note,
+            target_freq=target_freq,
+            cents=cents,
+            target=target,
+            timestamp=self.audio.captured_at
+        )
+        return True
+    
+    def _configure_for(self, target):
+        """Set decimation, search band and target note for a new target"""
+        tuning_name, string_index, auto_detect = target
+        
+        min_freq, max_freq = TuningManager.get_frequency_range(tuning_name)
+        order = TuningManager.get_string_order(tuning_name)
+        string_freq = None
+        if not auto_detect and string_index < len(order):
+            string_freq = order[string_index][1]
+        
+        # Decimation follows the highest string of the tuning
+        if DECIMATION:
+            self.audio.set_decimation(max_freq)
+        
+        # Window length follows the lowest note we may have to detect
+        if ADAPTIVE_WINDOW:
+            self.audio.set_window(string_freq or min_freq)
+        
+        # Narrow the pitch search to the current tuning or string
+        if PITCH_SEARCH_MODE == "tuning":
+            min_freq, max_freq = TuningManager.get_search_range(*target)
+            if min_freq is None:
+                self.audio.clear_search_range()
+            else:
+                self.audio.set_search_range(min_freq, max_freq)
+        
+        # In manual mode the note is known, so measure around it directly
+        if TARGETED_DETECTION:
+            self.audio.set_target_frequency(string_freq)
+        
+        self._range_target = target
+    
+    # ============================================================
+    # BACKGROUND THREAD
+    # ============================================================
+    @property
+    def running(self):
+        """True while the background thread owns the pipeline"""
+        return self._running
+    
+    def start(self):
+        """Run the pipeline on a background thread"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        """Worker loop: keep publishing readings while a target is set"""
+        while self._running:
+            if not self.step(block=True):
+                time.sleep(0.01)
+    
+    def stop(self):
+        """Stop the background thread"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+
+# ============================================================
+# MULTIPROCESS BACKEND
+# ============================================================
+TUNING_NAMES = list(TUNING_FREQUENCIES) + [CHROMATIC_TUNING]
+
+# Control block fields (int64): the main process writes the target and
+# bumps VERSION last; the DSP process re-reads VERSION to detect a torn read
+CTRL_VERSION, CTRL_TUNING, CTRL_STRING, CTRL_AUTO, CTRL_STOP = range(5)
+CTRL_FIELDS = 5
+
+# Result record fields (float64)
+(REC_FREQUENCY, REC_CONFIDENCE, REC_STRING, REC_TARGET_FREQ, REC_CENTS,
+ REC_TIMESTAMP, REC_TUNING, REC_TARGET_STRING, REC_AUTO) = range(9)
+REC_FIELDS = 9
+
+
+class SharedRing:
+    """
+    Single-writer ring of fixed-size float64 records in shared memory
+    
+    Layout: int64 record counter, int64 sequence number per slot, then the
+    records. A slot's sequence number is invalidated before the record is
+    rewritten and set after, so readers can detect a torn copy.
+    """
+    
+    def __init__(self, slots, width, name=None):
+        self.slots = slots
+        self.width = width
+        create = name is None
+        size = 8 * (1 + slots) + 8 * slots * width
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        
+        buf = self.shm.buf
+        self._count = np.ndarray((1,), dtype=np.int64, buffer=buf)
+        self._seqs = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=8)
+        self._records = np.ndarray((slots, width), dtype=np.float64,
+                                   buffer=buf, offset=8 * (1 + slots))
+        if create:
+            self._count[0] = 0
+            self._seqs[:] = -1
+    
+    @property
+    def name(self):
+        """Shared memory block name for attaching from another process"""
+        return self.shm.name
+    
+    @property
+    def count(self):
+        """Total records written since creation"""
+        return int(self._count[0])
+    
+    def write(self, record):
+        """Append a record, overwriting the oldest one"""
+        index = self.count
+        slot = index % self.slots
+        self._seqs[slot] = -1
+        self._records[slot] = record
+        self._seqs[slot] = index
+        self._count[0] = index + 1
+    
+    def read_latest(self, out):
+        """
+        Copy the newest record into out
+        
+        Returns:
+            True if a consistent record was copied
+        """
+        for _ in range(3):
+            index = self.count - 1
+            if index < 0:
+                return False
+            slot = index % self.slots
+            np.copyto(out, self._records[slot])
+            if self._seqs[slot] == index:
+                return True
+        return False
+    
+    def close(self):
+        """Detach from the shared memory block"""
+        self._count = self._seqs = self._records = None
+        self.shm.close()
+
+
+def _encode_target(target):
+    """Pack a (tuning_name, string_index, auto_detect) target into ints"""
+    tuning_name, string_index, auto_detect = target
+    return (
+        TUNING_NAMES.index(tuning_name),
+        -1 if string_index is None else string_index,
+        int(auto_detect)
+    )
+
+
+def _decode_target(tuning, string_index, auto):
+    """Unpack a target encoded by _encode_target"""
+    return (
+        TUNING_NAMES[int(tuning)],
+        None if string_index < 0 else int(string_index),
+        bool(auto)
+    )
+
+
+def _run_dsp_process(results_name, results_slots, control_name):
+    """
+    Entry point of the DSP process
+    
+    Owns the PyAudio stream (captured by callback into a local ring
+    buffer) and a PitchWorker, and publishes every reading into the
+    shared results ring.
+    """
+    from audio import AudioProcessor
+    
+    results = SharedRing(results_slots, REC_FIELDS, name=results_name)
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    control = np.ndarray((CTRL_FIELDS,), dtype=np.int64, buffer=control_shm.buf)
+    
+    audio = AudioProcessor(capture_mode="callback")
+    worker = PitchWorker(audio)
+    record = np.empty(REC_FIELDS)
+    version = 0
+    
+    try:
+        while control[CTRL_STOP] == 0:
+            # Pick up target changes from the main process
+            current = int(control[CTRL_VERSION])
+            if current != version:
+                fields = control[CTRL_TUNING:CTRL_AUTO + 1].copy()
+                if int(control[CTRL_VERSION]) == current:
+                    version = current
+                    if fields[0] < 0:
+                        worker.clear_target()
+                    else:
+                        worker.set_target(*_decode_target(*fields))
+            
+            if not worker.step(block=True):
+                time.sleep(0.01)
+                continue
+            
+            reading = worker.latest
+            tuning, target_string, auto = _encode_target(reading.target)
+            record[:] = (
+                reading.frequency, reading.confidence,
+                -1 if reading.string_index is None else reading.string_index,
+                np.nan if reading.target_freq is None else reading.target_freq,
+                np.nan if reading.cents is None else reading.cents,
+                reading.timestamp, tuning, target_string, auto
+            )
+            results.write(record)
+    finally:
+        audio.cleanup()
+        results.close()
+        control = None
+        control_shm.close()
+
+
+class ProcessPitchWorker(PitchWorker):
+    """
+    Pitch pipeline running in a separate process
+    
+    Capture and detection both happen in the child process, away from the
+    Flask threads' GIL; audio never crosses the process boundary. Targets
+    go down through a shared control block and readings come back through
+    a shared results ring, so neither side pickles or pipes anything.
+    """
+    
+    RESULT_SLOTS = 16
+    
+    def __init__(self):
+        super().__init__(audio=None)
+        self._results = SharedRing(self.RESULT_SLOTS, REC_FIELDS)
+        self._control_shm = shared_memory.SharedMemory(create=True, size=8 * CTRL_FIELDS)
+        self._control = np.ndarray((CTRL_FIELDS,), dtype=np.int64, buffer=self._control_shm.buf)
+        self._control[:] = 0
+        self._control[CTRL_TUNING] = -1
+        self._record = np.empty(REC_FIELDS)
+        self._process = None
+    
+    def _publish_target(self, fields):
+        """Write target fields, then bump the version the child polls"""
+        self._control[CTRL_TUNING:CTRL_AUTO + 1] = fields
+        self._control[CTRL_VERSION] += 1
+    
+    def set_target(self, tuning_name, string_index, auto_detect):
+        target = (tuning_name, string_index, auto_detect)
+        if target != self._target:
+            self._target = target
+            self._publish_target(_encode_target(target))
+    
+    def clear_target(self):
+        if self._target is not None:
+            self._target = None
+            self._publish_target((-1, -1, 0))
+    
+    @property
+    def latest(self):
+        """Most recent reading published by the DSP process"""
+        record = self._record
+        if not self._results.read_latest(record):
+            return EMPTY_READING
+        
+        target = _decode_target(record[REC_TUNING], record[REC_TARGET_STRING], record[REC_AUTO])
+        idx = None if record[REC_STRING] < 0 else int(record[REC_STRING])
+        note = TuningManager.get_note(target[0], idx)
+        target_freq, cents = record[REC_TARGET_FREQ], record[REC_CENTS]
+        
+        return PitchReading(
+            frequency=float(record[REC_FREQUENCY]),
+            confidence=float(record[REC_CONFIDENCE]),
+            string_index=idx,
+            note=note,
+            target_freq=None if np.isnan(target_freq) else float(target_freq),
+            cents=None if np.isnan(cents) else float(cents),
+            target=target,
+            timestamp=float(record[REC_TIMESTAMP])
+        )
+    
+    def step(self, block=False):
+        # Readings are produced by the DSP process
+        return False
+    
+    def start(self):
+        """Launch the DSP process"""
+        self._running = True
+        self._process = multiprocessing.Process(
+            target=_run_dsp_process,
+            args=(self._results.name, self.RESULT_SLOTS, self._control_shm.name),
+            daemon=True
+        )
+        self._process.start()
+    
+    def stop(self):
+        """Stop the DSP process and release the shared memory"""
+        if self._control is None:
+            return
+        self._running = False
+        if self._process is not None:
+            self._control[CTRL_STOP] = 1
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+        
+        self._control = None
+        shm = self._results.shm
+        self._results.close()
+        shm.unlink()
+        self._control_shm.close()
+        self._control_shm.unlink()
+
+
+def create_pitch_worker(audio=None, backend=DSP_BACKEND):
+    """
+    Create the pitch pipeline for a DSP backend
+    
+    Args:
+        audio: AudioProcessor used by the "inline" and "thread" backends
+        backend: "inline", "thread" or "process"
+    
+    Returns:
+        PitchWorker (already started unless inline)
+    """
+    if backend == "process":
+        worker = ProcessPitchWorker()
+    else:
+        worker = PitchWorker(audio)
+    
+    if backend != "inline":
+        worker.start()
+    return worker